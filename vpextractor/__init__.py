@@ -29,7 +29,25 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 __version__ = '0.1.4'
 
-from .generalUI import main as vpextract
-from .data import DataExplorer
-from .generalUI import runall
+# the modules are imported on first use (PEP 562), so that e.g. ``DataExplorer`` 
+# can be used without importing matplotlib and fitz
+_lazy = {
+    'vpextract': ('generalUI', 'main'),
+    'runall': ('generalUI', 'runall'),
+    'DataExplorer': ('data', 'DataExplorer'),
+    }
+
+__all__ = ['vpextract', 'runall', 'DataExplorer']
+
+def __getattr__(name):
+    if name in _lazy:
+        from importlib import import_module
+        module, attr = _lazy[name]
+        value = getattr(import_module(f'.{module}', __name__), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
 
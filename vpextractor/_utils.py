@@ -9,7 +9,6 @@ import warnings
 import pickle
 import os
 import numpy as np
-import matplotlib.pyplot as plt
 from collections.abc import Iterable
 
 #%% functions from astrotable
@@ -106,6 +105,13 @@ def load_pickle(fname):
         else:
             return data
 
+def _get_offset(axis):
+    # the offset text of the tick labels (e.g., "1e5"). the formatter only knows it after the locations are set,
+    # which is done here instead of drawing the figure (which needs pyplot and is not thread-safe)
+    formatter = axis.get_major_formatter()
+    formatter.set_locs(axis.get_majorticklocs())
+    return formatter.get_offset().replace('\N{MINUS SIGN}', '-') # unicode minus (axes.unicode_minus)
+
 def _annotate(x=None, y=None, xpos=.1, ypos=.1, xtxt=None, ytxt=None, xfmt='.2f', yfmt='.2f', marker='', style='through', label=None, ax=None, **lineargs):
     '''
     Plot a point with a marker,
@@ -145,8 +151,8 @@ def _annotate(x=None, y=None, xpos=.1, ypos=.1, xtxt=None, ytxt=None, xfmt='.2f'
         'axis': only plot line(s) on the left and/or beneath the point.
     label : str, optional
         The label for the lines.
-    ax : optional
-        The axis where you want to plot the lines.
+    ax : Axes
+        The axis where you want to plot the lines (required: pyplot's current axis is not used).
     **lineargs : 
         Keyword arguments for lines.
     '''
@@ -154,7 +160,7 @@ def _annotate(x=None, y=None, xpos=.1, ypos=.1, xtxt=None, ytxt=None, xfmt='.2f'
     artists = {}
     
     if ax is None:
-        ax = plt.gca()
+        raise ValueError('"ax" should be given.')
     xmin, xmax = ax.get_xlim()
     xscale = ax.get_xscale()
     if xscale == 'log':
@@ -213,8 +219,7 @@ def _annotate(x=None, y=None, xpos=.1, ypos=.1, xtxt=None, ytxt=None, xfmt='.2f'
                 label = None
             artists['vline'] = ax.axvline(x, ymax=lineymax, label=label, **lineargs)
             if xpos is not None:
-                plt.pause(.01) # this pause is essential. without this pause, the ScalarFormatter (got by ax.xaxis.get_major_formatter()) has not yet been set, so one always get offset == 1.
-                offset = ax.xaxis.get_major_formatter().get_offset()
+                offset = _get_offset(ax.xaxis)
                 if offset == '':
                     offset = 1
                 else:
@@ -241,8 +246,7 @@ def _annotate(x=None, y=None, xpos=.1, ypos=.1, xtxt=None, ytxt=None, xfmt='.2f'
                 label = None
             artists['hline'] = ax.axhline(y, xmax=linexmax, label=label, **lineargs)
             if ypos is not None:
-                plt.pause(.01) # this pause is essential. without this pause, the ScalarFormatter (got by ax.xaxis.get_major_formatter()) has not yet been set, so one always get offset == 1.
-                offset = ax.yaxis.get_major_formatter().get_offset()
+                offset = _get_offset(ax.yaxis)
                 if offset == '':
                     offset = 1
                 else:
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+batch runner: the non-interactive steps for many figures at a time
+
+The drawings of each figure are extracted (``fileio.pdf2drawings``, with broken paths split)
+and deduplicated in a process pool. If a marker library is given, the elements are parsed
+and identified with it (see ``markerlib.MarkerLibrary``); if data axes are given (a template saved
+by ``mplui.DataExtractor``, e.g., from a figure with the same layout), the data are exported.
+What is left can be done later with ``vpextract`` as usual.
+
+Jobs are recorded in a ledger (an SQLite database), so that an interrupted run resumes
+where it stopped: jobs already done are skipped, and the results of finished steps
+saved in the store are reused.
+
+To run it in the terminal::
+
+    vpextract-batch papers/ 'more/**/*.pdf' --store results.sqlite --markers markers.sqlite -j 8
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import traceback
+import numpy as np
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from .store import open_store
+from .utils import positive_float
+
+SUFFIXES = ('.pdf', '.svg')
+
+def expand_inputs(patterns, suffixes=SUFFIXES):
+    '''
+    figure files given by paths, directories (searched recursively for files with `suffixes`)
+    or glob patterns (``**`` matches any directories), without duplicates, in the order given
+    '''
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                found += [os.path.join(root, file) for file in sorted(files) if file.lower().endswith(suffixes)]
+        elif glob.has_magic(pattern):
+            found += [path for path in sorted(glob.glob(pattern, recursive=True))
+                      if os.path.isfile(path) and path.lower().endswith(suffixes)]
+        elif os.path.isfile(pattern):
+            found.append(pattern)
+        else:
+            print(f"WARNING: '{pattern}' not found")
+    return list(dict.fromkeys(os.path.abspath(path) for path in found))
+
+class JobLedger():
+    '''
+    persistent record of batch jobs (one per figure and page) in an SQLite database
+
+    The status of a job is 'pending', 'running', 'done' or 'failed'.
+    A job found 'running' was interrupted, and is run again.
+    '''
+    schema = '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        path TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        stage TEXT,
+        error TEXT,
+        npaths INTEGER,
+        seconds REAL,
+        started REAL,
+        finished REAL,
+        PRIMARY KEY (path, page));
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.executescript(self.schema)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, paths, page=0):
+        # add jobs not in the ledger yet
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO jobs (path, page) VALUES (?, ?)', [(path, page) for path in paths])
+
+    def status(self, path, page=0):
+        row = self.conn.execute('SELECT status FROM jobs WHERE path = ? AND page = ?', (path, page)).fetchone()
+        return None if row is None else row[0]
+
+    def todo(self, paths, page=0, retry_failed=False, redo=False):
+        # jobs of `paths` to run
+        skip = set() if redo else {'done'} if retry_failed else {'done', 'failed'}
+        return [path for path in paths if self.status(path, page) not in skip]
+
+    def start(self, path, page=0):
+        with self.conn:
+            self.conn.execute("UPDATE jobs SET status = 'running', stage = NULL, error = NULL, started = ?, finished = NULL WHERE path = ? AND page = ?",
+                              (time.time(), path, page))
+
+    def finish(self, path, page=0, stage=None, error=None, npaths=None, seconds=None):
+        # error: None if the job is done
+        with self.conn:
+            self.conn.execute('UPDATE jobs SET status = ?, stage = ?, error = ?, npaths = ?, seconds = ?, finished = ? WHERE path = ? AND page = ?',
+                              ('done' if error is None else 'failed', stage, error, npaths, seconds, time.time(), path, page))
+
+    def counts(self):
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'))
+
+    def failures(self):
+        return self.conn.execute("SELECT path, page, stage, error FROM jobs WHERE status = 'failed' ORDER BY path, page").fetchall()
+
+def run_job(path, page=0, store=None, markers=None, axes=None, clip=None, dedup=True, merge_fill_stroke=False,
+            simplify=None, simplify_units='page', stitch=None, resample=None, time_limit=None, redo=False, native_svg=False):
+    '''
+    the non-interactive steps for one figure; results of steps already saved in the store are reused unless `redo`
+    stitch: tolerance for joining lines, see drawing.group_paths
+    resample: number of x of the common grid that lines are also exported on, see export.DataExporter
+    native_svg: read SVG files directly instead of with fitz, see fileio.pdf2drawings
+    time_limit: if given, the job is stopped (with progress.Cancelled raised) after this many seconds, see progress.CancelToken
+
+    Returns
+    -------
+    info : dict
+        'stage' (the last step run), 'npaths' (number of paths extracted), 'nunique' (after deduplication),
+        'identified' (number of elements identified with the marker library), 'exported' (number of axes exported).
+        If a step fails, the exception raised has the attribute ``stage``.
+    '''
+    from .fileio import pdf2drawings
+    from .drawing import remove_duplicate_paths, parse_paths, group_paths, fingerprint_objects, rebuild_objects
+    from .progress import CancelToken
+
+    info = {'stage': None, 'npaths': None, 'nunique': None, 'identified': None, 'exported': None}
+    cancel = CancelToken(time_limit) # checked by long stages between chunks, and before each stage below
+    opened = isinstance(store, (str, os.PathLike))
+    store = open_store(store)
+    try:
+        info['stage'] = 'drawings'
+        if redo or not store.exists('drawings', path, page):
+            paths = pdf2drawings(path, out_path=False, page=page, split_broken_path=True, clip=clip, native_svg=native_svg,
+                                 cancel=cancel)
+            store.save_drawings(path, paths, page=page, yes=True)
+        else:
+            paths = store.load_drawings(path, page=page)
+        info['npaths'] = len(paths)
+        if len(paths) == 0:
+            raise ValueError('found nothing to extract: is it a vector image?')
+
+        info['stage'] = 'dedup'
+        cancel.check()
+        inverse = None
+        if dedup:
+            paths, inverse = remove_duplicate_paths(paths, merge_fill_stroke=merge_fill_stroke)
+        info['nunique'] = len(paths)
+
+        if markers is not None and (redo or not store.exists('identification', path, page)):
+            from .markerlib import MarkerLibrary
+            info['stage'] = 'parse'
+            path_features = [parsed[3] for parsed in parse_paths(paths, cancel=cancel)]
+            info['stage'] = 'identification'
+            cancel.check()
+            with MarkerLibrary(markers) as library:
+                types, known_markers = library.classify(path_features)
+            info['identified'] = int(np.count_nonzero(types != b'u'))
+            store.save_identification(path, types if inverse is None else types[inverse], known_markers, page=page, yes=True)
+
+        if axes is not None and (redo or not store.exists('export', path, page)):
+            from .export import DataExporter
+            info['stage'] = 'group'
+            cancel.check()
+            if not store.exists('identification', path, page):
+                raise ValueError('elements not identified: give a marker library, or identify them with vpextract first')
+            types, known_markers = store.load_identification(path, page=page)
+            if inverse is not None: # types of the first one of duplicated paths
+                types = ''.join(types[i] for i in np.unique(inverse, return_index=True)[1])
+            selection = store.load_selection(path, page=page) if store.exists('selection', path, page) else None
+            if selection is not None and 'fingerprint' not in selection: # saved by earlier versions: the objects themselves
+                objects = selection
+            elif selection is not None and selection['fingerprint'] == fingerprint_objects(paths, types, known_markers, marker_getter='mean', stitch=stitch):
+                objects = rebuild_objects(paths, selection)
+            else: # all objects, if not selected (or selected on different objects)
+                objects = group_paths(paths, types, mode='typestr', markers=known_markers, marker_getter='mean', stitch=stitch,
+                                      cancel=cancel)
+            info['stage'] = 'export'
+            cancel.check()
+            exporter = DataExporter(objects, simplify=simplify, simplify_units=simplify_units, resample=resample)
+            export_data = exporter.export_axes(axes)
+            store.save_export(path, export_data, page=page)
+            info['exported'] = len(export_data) - 1
+    except Exception as e:
+        e.stage = info['stage']
+        raise
+    finally:
+        if opened:
+            store.close()
+    return info
+
+def _run_job(path, page, kwargs):
+    # run in a worker process: errors are returned, so that the traceback is kept
+    t0 = time.perf_counter()
+    try:
+        info = run_job(path, page, **kwargs)
+        error = None
+    except Exception as e:
+        info = {'stage': getattr(e, 'stage', None), 'npaths': None}
+        error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+    info['seconds'] = time.perf_counter() - t0
+    return path, info, error
+
+def run_batch(patterns, ledger='vpextract-jobs.sqlite', page=0, workers=None, retry_failed=False, redo=False, **kwargs):
+    '''
+    run the non-interactive steps for figures given by paths, directories or glob patterns (see ``expand_inputs``)
+    in a process pool, recording the jobs in a ledger (see ``JobLedger``)
+
+    Parameters
+    ----------
+    patterns : list of str
+        Figure files, directories or glob patterns.
+    ledger : str, optional
+        Path to the job ledger (SQLite database). The default is 'vpextract-jobs.sqlite'.
+    page : int, optional
+        Page number (starting from 0). The default is 0.
+    workers : int, optional
+        Number of worker processes. If None, use all CPU cores. The default is None.
+    retry_failed : bool, optional
+        Run jobs that failed in earlier runs again. The default is False.
+    redo : bool, optional
+        Run all jobs again, without reusing saved results. The default is False.
+    **kwargs
+        Passed to ``run_job``. The store must be given by its path (or None).
+
+    Returns
+    -------
+    summary : dict
+        'total' (number of jobs), 'skipped' (already done), 'done', 'failed', 'npaths' (number of paths extracted)
+        and 'seconds' (wall time).
+    '''
+    paths = expand_inputs(patterns)
+    store = kwargs.get('store')
+    if store is not None and not isinstance(store, (str, os.PathLike)):
+        raise ValueError('the store of a batch run must be given by its path')
+    if store is not None:
+        open_store(store).close() # create the database before the workers use it
+
+    t0 = time.perf_counter()
+    summary = {'total': len(paths), 'skipped': 0, 'done': 0, 'failed': 0, 'npaths': 0, 'seconds': 0.}
+    with JobLedger(ledger) as jobs:
+        jobs.add(paths, page=page)
+        todo = jobs.todo(paths, page=page, retry_failed=retry_failed, redo=redo)
+        summary['skipped'] = len(paths) - len(todo)
+        print(f'{len(paths)} figures found, {len(todo)} to run ({summary["skipped"]} skipped), ledger "{ledger}"')
+        if workers is None or workers == -1:
+            workers = os.cpu_count()
+        # at most one job per worker is submitted at a time, so that if a worker dies (e.g., killed when out of memory),
+        # which breaks the pool, only the jobs running then fail; the other jobs are run in a new pool
+        queue = list(reversed(todo))
+        n = 0
+        while queue:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                running = {} # future: (path, time submitted)
+                broken = False
+                while running or (queue and not broken):
+                    while queue and not broken and len(running) < workers:
+                        path = queue.pop()
+                        jobs.start(path, page=page)
+                        running[executor.submit(_run_job, path, page, dict(kwargs, redo=redo))] = path, time.perf_counter()
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, submitted = running.pop(future)
+                        try:
+                            path, info, error = future.result()
+                        except BrokenProcessPool:
+                            broken = True
+                            info = {'stage': None, 'npaths': None, 'seconds': time.perf_counter() - submitted}
+                            error = 'a worker process terminated abruptly (e.g., out of memory) while running this or another job'
+                        n += 1
+                        jobs.finish(path, page=page, stage=info['stage'], error=error, npaths=info['npaths'], seconds=info['seconds'])
+                        if error is None:
+                            summary['done'] += 1
+                            summary['npaths'] += info['npaths']
+                            status = f"{info['npaths']} paths"
+                        else:
+                            summary['failed'] += 1
+                            status = f"FAILED at {info['stage']}: {error}"
+                        print(f"[{n}/{len(todo)}] {path} ({info['seconds']:.1f} s): {status}")
+
+        summary['seconds'] = time.perf_counter() - t0
+        print_summary(summary, jobs)
+    return summary
+
+def print_summary(summary, jobs):
+    seconds = summary['seconds']
+    run = summary['done'] + summary['failed']
+    print(f"\n{run} jobs run in {seconds:.1f} s: {summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped")
+    if run and seconds > 0:
+        print(f"throughput: {run / seconds:.2f} figures/s, {summary['npaths'] / seconds:.0f} paths/s")
+    failures = jobs.failures()
+    if failures:
+        print(f'{len(failures)} failed jobs in the ledger (run again with --retry-failed):')
+        for path, page, stage, error in failures:
+            print(f'  {path} (page {page}) at {stage}: {error}')
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog='vpextract-batch',
+        description='run the non-interactive steps of vpextract for many figures, resuming interrupted runs',
+        epilog='This is part of the Python package vector-plot-extractor, (C) Yu-Chen Wang, distributed under GPL v3.')
+    parser.add_argument('inputs', nargs='+', help='figure files, directories (searched recursively) or glob patterns')
+    parser.add_argument('--ledger', default='vpextract-jobs.sqlite',
+                        help='SQLite database recording the jobs, used to resume (default: vpextract-jobs.sqlite)')
+    parser.add_argument('--page', type=int, default=0, help='page number, starting from 0 (default: 0)')
+    parser.add_argument('--store', default=None, metavar='DATABASE',
+                        help='save results to this SQLite database instead of files next to the figure files')
+    parser.add_argument('--markers', default=None, metavar='LIBRARY',
+                        help='identify elements with this marker library (SQLite database)')
+    parser.add_argument('--axes-template', default=None, metavar='AXES',
+                        help='export data with the data axes in this file (saved by vpextract, e.g., figure.pdf.axes)')
+    parser.add_argument('--clip', nargs=4, type=float, metavar=('X0', 'Y0', 'X1', 'Y1'),
+                        help='only extract elements overlapping with this rectangle (page coordinates in points, origin at the top-left corner)')
+    parser.add_argument('--native-svg', action='store_true',
+                        help='read SVG files directly instead of rendering them with PyMuPDF (faster for large files)')
+
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes (default: all CPU cores)')
+    parser.add_argument('--retry-failed', action='store_true', help='run jobs that failed in earlier runs again')
+    parser.add_argument('--redo', action='store_true', help='run all jobs again, without reusing saved results')
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help='do not remove elements drawn more than once with the same shape and style')
+    parser.add_argument('--merge-fill-stroke', action='store_true',
+                        help='merge a filled element and an outlined element with the same shape into one element')
+    parser.add_argument('--simplify', type=float, default=None, metavar='TOL',
+                        help='drop line points within TOL of the simplified line when exporting (Ramer-Douglas-Peucker)')
+    parser.add_argument('--simplify-units', choices=['page', 'data'], default='page',
+                        help='units of TOL: points of the page, or data units (decades for log axes)')
+    parser.add_argument('--resample', type=int, default=None, metavar='N',
+                        help='also export the lines of each axis on a common grid of N x (evenly spaced in the axis scale)')
+    parser.add_argument('--stitch', type=positive_float, default=None, metavar='TOL',
+                        help='join line segments of the same style whose ends coincide within TOL (points of the page) into one line')
+    parser.add_argument('--time-limit', type=float, default=None, metavar='SECONDS',
+                        help='stop a figure (recorded as failed) if it takes longer than this')
+
+    args = parser.parse_args(argv)
+
+    axes = None
+    if args.axes_template is not None:
+        with open(args.axes_template) as f:
+            axes = json.load(f)
+
+    summary = run_batch(args.inputs, ledger=args.ledger, page=args.page, workers=args.workers,
+                        retry_failed=args.retry_failed, redo=args.redo,
+                        store=args.store, markers=args.markers, axes=axes, clip=args.clip,
+                        dedup=not args.keep_duplicates, merge_fill_stroke=args.merge_fill_stroke,
+                        simplify=args.simplify, simplify_units=args.simplify_units, stitch=args.stitch,
+                        resample=args.resample, time_limit=args.time_limit, native_svg=args.native_svg)
+    if summary['failed']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
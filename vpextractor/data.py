@@ -5,26 +5,259 @@ Created on Tue Jan 23 2024
 @author: Yu-Chen Wang
 """
 
+import os
 import json
 import numpy as np
-import matplotlib.pyplot as plt
+from .store import open_store
+from .resample import resample_lines, common_grid
 
 class DataExplorer():
-    def __init__(self, path):
-        if path.endswith(('.pdf', '.svg', '.ps')):
-            path += '.out'
-        self.filepath = path
-        
-        with open(self.filepath) as f:
-            self.data = json.load(f)
+    def __init__(self, path, store=None, page=0):
+        # store: if given, load data exported for the figure file `path` (and `page`) from this store, see store.open_store
+        if store is not None:
+            self.filepath = path
+            opened = isinstance(store, (str, os.PathLike)) # closed here if opened here
+            store = open_store(store)
+            try:
+                self.data = store.load_export(path, page=page)
+            finally:
+                if opened:
+                    store.close()
+        else:
+            if path.endswith(('.pdf', '.svg', '.ps')):
+                path += '.out'
+            self.filepath = path
+            
+            with open(self.filepath) as f:
+                self.data = json.load(f)
         
         for key, axis_data in self.data.items():
             if key == 'meta':
                 continue
-            for type_data in axis_data.values():
-                for data in type_data:
+            for typ in ['lines', 'scatters']:
+                for data in axis_data[typ]:
                     data['x'] = np.array(data['x'])
                     data['y'] = np.array(data['y'])
+            if 'resampled' in axis_data: # see export.DataExporter
+                axis_data['resampled'] = {key: np.array(value, dtype=int if key == 'lines' else float) 
+                                          for key, value in axis_data['resampled'].items()}
+        self._index = None
+    
+    @property
+    def index(self):
+        '''
+        Index of all series (lines and scatters of all axes), built when first used: a dict of arrays with one 
+        entry for each series, whose position is the series id (see ``select``, ``concat`` and ``plot_series``).
+        
+        'axis' (axis number), 'type' ('lines' or 'scatters'), 'position' (in ``self[axis][type]``), 
+        'color' (RGBA of lines, or the face color of scatters), 'edgecolor' (RGBA of the edges of scatters, NaN for lines),
+        'linestyle' ('-' or '--'), 'linewidth' and 'npoints'.
+        Scatters whose markers have different styles are indexed by the style of the first marker.
+        '''
+        if self._index is None:
+            from matplotlib.colors import to_rgba_array
+            def rgba(color):
+                if color is None or len(color) == 0: # e.g., no edges
+                    return [np.nan] * 4
+                return to_rgba_array(color)[0] # the first one if there are more
+            def linestyle(ls):
+                if isinstance(ls, (list, tuple)): # dash patterns (offset, dashes) of scatters
+                    if isinstance(ls[0], (list, tuple)): # one for each marker
+                        ls = ls[0]
+                    return '-' if not ls[1] else '--'
+                return ls
+            def linewidth(lw):
+                return np.ravel(lw)[0] if np.size(lw) else np.nan # the first one if there are more
+            
+            self._series = []
+            index = {key: [] for key in ['axis', 'type', 'position', 'color', 'edgecolor', 'linestyle', 'linewidth', 'npoints']}
+            for key, axis_data in self.data.items():
+                if key == 'meta':
+                    continue
+                for typ in ['lines', 'scatters']:
+                    for i, data in enumerate(axis_data[typ]):
+                        self._series.append(data)
+                        index['axis'].append(key)
+                        index['type'].append(typ)
+                        index['position'].append(i)
+                        index['color'].append(rgba(data['color'] if typ == 'lines' else data['facecolor']))
+                        index['edgecolor'].append(rgba(None if typ == 'lines' else data['edgecolor']))
+                        index['linestyle'].append(linestyle(data['linestyle']))
+                        index['linewidth'].append(linewidth(data['linewidth']))
+                        index['npoints'].append(data['x'].size)
+            self._index = {
+                'axis': np.array(index['axis'], dtype=object),
+                'type': np.array(index['type'], dtype=object),
+                'position': np.array(index['position'], dtype=int),
+                'color': np.array(index['color'], dtype=float).reshape(-1, 4),
+                'edgecolor': np.array(index['edgecolor'], dtype=float).reshape(-1, 4),
+                'linestyle': np.array(index['linestyle'], dtype=object),
+                'linewidth': np.array(index['linewidth'], dtype=float),
+                'npoints': np.array(index['npoints'], dtype=int),
+                }
+        return self._index
+    
+    def series(self, ids):
+        # data of series (see `index`), a dict with 'x', 'y' and the style as exported, or a list of them
+        self.index
+        if np.ndim(ids) == 0:
+            return self._series[ids]
+        return [self._series[i] for i in ids]
+    
+    def select(self, axis=None, type=None, color=None, edgecolor=None, linestyle=None, linewidth=None, 
+               min_points=None, max_points=None, atol=.01):
+        '''
+        ids of the series matching all conditions given (see `index`)
+
+        Parameters
+        ----------
+        axis : int, str or list, optional
+            Axis number(s).
+        type : str, optional
+            'lines' or 'scatters'.
+        color, edgecolor : color, optional
+            Any Matplotlib color; channels (RGBA, from 0 to 1) must be within `atol`.
+        linestyle : str, optional
+            '-' or '--'.
+        linewidth : float, optional
+            Within `atol`.
+        min_points, max_points : int, optional
+            Range of the number of points.
+        atol : float, optional
+            Tolerance of colors and line widths. The default is 0.01.
+
+        Returns
+        -------
+        ids : numpy.ndarray
+            The series ids, e.g., ``explorer.select(color='red', linestyle='--')`` for all red dashed lines of all axes.
+        '''
+        index = self.index
+        mask = np.ones(index['axis'].size, dtype=bool)
+        if axis is not None:
+            axes = [str(a) for a in (axis if isinstance(axis, (list, tuple, np.ndarray)) else [axis])]
+            mask &= np.isin(index['axis'], axes)
+        if type is not None:
+            mask &= index['type'] == type
+        for key, value in [('color', color), ('edgecolor', edgecolor)]:
+            if value is not None:
+                from matplotlib.colors import to_rgba
+                mask &= np.all(np.abs(index[key] - to_rgba(value)) <= atol, axis=1)
+        if linestyle is not None:
+            mask &= index['linestyle'] == linestyle
+        if linewidth is not None:
+            mask &= np.abs(index['linewidth'] - linewidth) <= atol
+        if min_points is not None:
+            mask &= index['npoints'] >= min_points
+        if max_points is not None:
+            mask &= index['npoints'] <= max_points
+        return np.flatnonzero(mask)
+    
+    def concat(self, ids=None):
+        '''
+        data of series concatenated into one array
+
+        Parameters
+        ----------
+        ids : array-like, optional
+            Series ids (see ``select``). The default is None (all series).
+
+        Returns
+        -------
+        data : numpy.ndarray
+            Array of shape (number of points, 3): the series id, x and y of each point.
+        '''
+        ids = np.arange(self.index['npoints'].size) if ids is None else np.asarray(ids, dtype=int)
+        series = self.series(ids)
+        return np.column_stack([
+            np.repeat(ids, self.index['npoints'][ids]).astype(float),
+            np.concatenate([data['x'] for data in series] + [[]]),
+            np.concatenate([data['y'] for data in series] + [[]]),
+            ])
+    
+    def plot_series(self, ids=None, ax=None):
+        '''
+        plot series with one collection for all lines and one for all scatters, for fast overviews of large exports
+
+        Parameters
+        ----------
+        ids : array-like, optional
+            Series ids (see ``select``). The default is None (all series).
+        ax : Axes, optional
+            The Matplotlib Axes object. If not given, the currect axis (``plt.gca()``) will be used.
+
+        Returns
+        -------
+        lines : LineCollection or None
+        scatters : PathCollection or None
+        '''
+        from matplotlib.collections import LineCollection
+        if ax is None:
+            import matplotlib.pyplot as plt
+            ax = plt.gca()
+        index = self.index
+        ids = np.arange(index['npoints'].size) if ids is None else np.asarray(ids, dtype=int)
+        
+        lines = scatters = None
+        line_ids = ids[index['type'][ids] == 'lines']
+        if line_ids.size:
+            lines = LineCollection([np.column_stack([data['x'], data['y']]) for data in self.series(line_ids)],
+                                   colors=index['color'][line_ids], linewidths=index['linewidth'][line_ids],
+                                   linestyles=list(index['linestyle'][line_ids]))
+            ax.add_collection(lines)
+        scatter_ids = ids[index['type'][ids] == 'scatters']
+        if scatter_ids.size:
+            data = self.concat(scatter_ids)
+            counts = index['npoints'][scatter_ids]
+            edgecolors = index['edgecolor'][scatter_ids]
+            scatters = ax.scatter(data[:, 1], data[:, 2], fc=np.repeat(index['color'][scatter_ids], counts, axis=0),
+                                  ec=np.repeat(np.where(np.isnan(edgecolors), 0., edgecolors), counts, axis=0))
+        ax.autoscale_view()
+        return lines, scatters
+    
+    def scales(self, axisnumber):
+        # (xscale, yscale) of an axis ('linear' if not saved by the version exporting the data)
+        scales = self.data['meta'].get('axes', {}).get(str(axisnumber), {})
+        return scales.get('xscale', 'linear'), scales.get('yscale', 'linear')
+    
+    def resample(self, axisnumber=None, grid=None, num=200, xscale=None, yscale=None):
+        '''
+        resample all lines of an axis onto a common grid of x (at once, see ``resample.resample_lines``)
+
+        Lines are interpolated in the space of the axis scales, and lines whose x goes back and forth
+        are split into monotonic runs, each of which is a row of the result.
+
+        Parameters
+        ----------
+        axisnumber : int or str, optional
+            Number of axis. The default is None (axis 0).
+        grid : array-like, optional
+            The x to resample at. If not given, `num` x evenly spaced (in the x scale) over the range of the lines.
+        num : int, optional
+            Number of x of the grid, if `grid` is not given. The default is 200.
+        xscale, yscale : str, optional
+            'linear' or 'log'. The default is None (the scales of the axis when the data was exported).
+
+        Returns
+        -------
+        grid : numpy.ndarray
+            The x.
+        y : numpy.ndarray
+            Array of shape (number of runs, len(grid)), NaN where a run does not cover the grid.
+        lines : numpy.ndarray
+            The index (in ``self[axisnumber]['lines']``) of the line of each row of `y`.
+        '''
+        if axisnumber is None:
+            axisnumber = 0
+        saved_xscale, saved_yscale = self.scales(axisnumber)
+        xscale = saved_xscale if xscale is None else xscale
+        yscale = saved_yscale if yscale is None else yscale
+        lines = self[axisnumber]['lines']
+        xs = [data['x'] for data in lines]
+        if grid is None:
+            grid = common_grid(xs, num=num, scale=xscale)
+        grid = np.asarray(grid, dtype=float)
+        y, line_idx = resample_lines(xs, [data['y'] for data in lines], grid, xscale=xscale, yscale=yscale)
+        return grid, y, line_idx
     
     def plot(self, axisnumber=None, ax=None):
         '''
@@ -46,6 +279,7 @@ class DataExplorer():
         if axisnumber is None:
             axisnumber = 0
         if ax is None:
+            import matplotlib.pyplot as plt
             ax = plt.gca()
         for data in self[axisnumber]['scatters']:
             ax.scatter(data['x'], data['y'], fc=data['facecolor'], ec=data['edgecolor'])
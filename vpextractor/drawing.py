@@ -13,12 +13,18 @@ from matplotlib.lines import Line2D
 from matplotlib.collections import PatchCollection, PathCollection, LineCollection
 from matplotlib.path import Path
 from matplotlib.colors import to_rgba
-import matplotlib.pyplot as plt
 import warnings
+import json
+import hashlib
 from copy import copy, deepcopy
-from itertools import chain
+from itertools import chain, repeat
+from concurrent.futures import ProcessPoolExecutor
+import os
 from .filter import select_paths
+from .stitch import stitch_lines, make_line_object
 from .utils import dedup
+from .sharedgeom import SharedGeometry, max_coords
+from .progress import iterate, report
 
 def add(ax, artist):
     # add artist to ax given different types
@@ -47,9 +53,10 @@ def get_color(artist):
         raise TypeError(type(artist))
 
 
-def split_broken_paths(paths):
+def split_broken_paths(paths, progress=None, cancel=None):
+    # progress, cancel: see progress.py
     split_paths = []
-    for path in paths:
+    for path in iterate(paths, 'splitting', progress, cancel):
         _, item_idxs = get_coords(path['items'])
         if len(item_idxs) > 1:
             for i, item_idx in enumerate(item_idxs):
@@ -61,6 +68,84 @@ def split_broken_paths(paths):
             split_paths.append(path)
     return split_paths
 
+_stroke_keys = ('color', 'width', 'dashes', 'lineCap', 'lineJoin', 'stroke_opacity', 'closePath')
+_fill_keys = ('fill', 'fill_opacity', 'even_odd')
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+def _geometry_key(items, decimals):
+    # item types, and all points (including control points) of items rounded to `decimals`
+    # points, rects and quads are accessed by index, see get_coords
+    kinds = tuple(item[0] for item in items)
+    vertices = []
+    for item in items:
+        if item[0] == 're':
+            vertices.extend(item[1][:4])
+        elif item[0] == 'qu':
+            for pt in item[1]:
+                vertices.extend((pt[0], pt[1]))
+        else:
+            for pt in item[1:]:
+                vertices.extend((pt[0], pt[1]))
+    vertices = np.round(np.array(vertices, dtype=float), decimals) + 0. # + 0. turns -0. into 0.
+    return kinds, vertices.tobytes()
+
+def remove_duplicate_paths(paths, decimals=2, merge_fill_stroke=False):
+    '''
+    remove paths drawn more than once with the same geometry and style
+
+    Parameters
+    ----------
+    paths : list
+        The paths.
+    decimals : int, optional
+        Points (in page coordinates) are rounded to this number of decimals
+        before they are compared. The default is 2.
+    merge_fill_stroke : bool, optional
+        If True, a fill-only path and a stroke-only path with the same geometry
+        are merged into one path with both fill and stroke. The default is False.
+
+    Returns
+    -------
+    unique_paths : list
+        The paths with duplicates removed, in the order of their first occurrence.
+    inverse : numpy.ndarray
+        ``paths[i]`` is drawn as ``unique_paths[inverse[i]]``.
+        For example, types of ``unique_paths`` can be mapped back to ``paths`` with ``types[inverse]``.
+    '''
+    unique_paths = []
+    inverse = np.empty(len(paths), dtype=int)
+    seen = {}
+    single = {} # geometry -> index of a fill-only or stroke-only path that may be merged with another one
+    for i, path in enumerate(paths):
+        geometry = _geometry_key(path['items'], decimals)
+        style = tuple(_hashable(path.get(key)) for key in ('type',) + _stroke_keys + _fill_keys)
+        key = geometry, style
+        if key in seen:
+            inverse[i] = seen[key]
+            continue
+
+        if merge_fill_stroke and path['type'] in ['f', 's']:
+            j = single.get(geometry)
+            if j is not None and unique_paths[j]['type'] != path['type']:
+                # merge with the earlier one: fill keys from the fill path, stroke keys from the stroke path
+                merged = dict(unique_paths[j])
+                keys = _fill_keys if path['type'] == 'f' else _stroke_keys
+                merged.update({k: path.get(k) for k in keys})
+                merged['type'] = 'fs'
+                unique_paths[j] = merged
+                del single[geometry]
+                seen[key] = inverse[i] = j
+                continue
+            single[geometry] = len(unique_paths)
+
+        seen[key] = inverse[i] = len(unique_paths)
+        unique_paths.append(path)
+    return unique_paths, inverse
+
 def parse_path(path, split_broken=True):
     '''
     a core function that parses path
@@ -82,6 +167,14 @@ def parse_path(path, split_broken=True):
         .
 
     '''
+    item_type, coords, path_feature = parse_path_geometry(path, split_broken=split_broken)
+    artist = make_artist(path, item_type, coords)
+    
+    return item_type, coords, artist, path_feature
+
+def parse_path_geometry(path, split_broken=True):
+    # the part of parse_path that does not make the artist: returns item_type, coords, path_feature
+    # (these are plain Python/numpy objects, cheap to send between processes)
     items = path['items']
     item_type = np.unique([item[0] for item in items])
     item_type = set(str(i) for i in item_type)
@@ -91,6 +184,23 @@ def parse_path(path, split_broken=True):
     else:
         for i in [0, 1]:
             coords[i] = list(chain(*coords[i]))
+    x, y = coords
+    x, y = np.array(x), np.array(y)
+    rel_pt = np.argmin(x)
+    x_rel, y_rel = x[rel_pt], y[rel_pt]
+    path_feature = { # features of the path used to identify similar paths
+        'rel_pos': np.array([x - x_rel, y - y_rel]), # relative positions
+        'type': '+'.join(item_type),
+        'color': np.array(path['color']),
+        'fill': np.array(path['fill']),
+        }
+    
+    return item_type, coords, path_feature
+
+def make_artist(path, item_type, coords, itempath=None):
+    # make the matplotlib artist for a path, given item_type and coords from parse_path_geometry
+    # itempath: the result of get_curv_path(path['items']) if already computed
+    items = path['items']
     patch_kwargs = dict(
         fill=False,
         closed=path['closePath'],
@@ -110,7 +220,8 @@ def parse_path(path, split_broken=True):
             alpha=path['fill_opacity'],
             ))
     if item_type in [{'c'}, {'c', 'l'}]:  # Bezier curve, or combination of Bezier curve & line
-        itempath = get_curv_path(items)
+        if itempath is None:
+            itempath = get_curv_path(items)
         patch_kwargs.pop('closed') # TODO: manually handle this: add the starting point at the end (if not)
         artist = PathPatch(itempath, **patch_kwargs)
     elif item_type == {'l'}: # line
@@ -128,35 +239,145 @@ def parse_path(path, split_broken=True):
     elif item_type == {'re'}:
         assert len(items) == 1
         item = items[0]
-        rect = item[1]
+        x0, y0, x1, y1 = item[1] # fitz.Rect, or a tuple from the raw backend (see fileio.py)
         patch_kwargs.pop('closed') # TODO: manually handle this: add the starting point at the end (if not)
-        # notes: the coordinates for fitz.fitz.Rect is UPSIDE DOWN, so `rect.tl` ("top-left") is the real "bottom-left" (smaller x, smaller y) in Matplotlib
+        # notes: the coordinates for fitz.fitz.Rect is UPSIDE DOWN, so `rect.tl` ("top-left", (x0, y0)) is the real "bottom-left" (smaller x, smaller y) in Matplotlib
         # see https://pymupdf.readthedocs.io/en/latest/rect.html
-        artist = Rectangle(rect.tl, rect.width, rect.height, **patch_kwargs)
+        artist = Rectangle((x0, y0), x1 - x0, y1 - y0, **patch_kwargs)
     elif item_type == {'qu'}:
         artist = Polygon(np.vstack(coords).T, **patch_kwargs)
     else:
         raise ValueError(f'unrecognized item_type {item_type}')
     
-    x, y = coords
-    x, y = np.array(x), np.array(y)
-    rel_pt = np.argmin(x)
-    x_rel, y_rel = x[rel_pt], y[rel_pt]
-    path_feature = { # features of the path used to identify similar paths
-        'rel_pos': np.array([x - x_rel, y - y_rel]), # relative positions
-        'type': '+'.join(item_type),
-        'color': np.array(path['color']),
-        'fill': np.array(path['fill']),
-        }
-    
     artist.set_picker(True)
     
-    return item_type, coords, artist, path_feature
+    return artist
 
-def plot_path(path, ax=None):
-    if ax is None:
-        ax = plt.gca()
-        
+def _curv_paths(paths, item_types):
+    # the Path of each curve (None for other paths), see get_curv_paths
+    curv = [i for i, item_type in enumerate(item_types) if item_type in [{'c'}, {'c', 'l'}]]
+    itempaths = [None] * len(paths)
+    for i, itempath in zip(curv, get_curv_paths([paths[i]['items'] for i in curv])):
+        itempaths[i] = itempath
+    return itempaths
+
+def _parse_geometry_chunk(paths, curves=False):
+    # run in worker processes by parse_paths; curves: also make the Path of curves (which is picklable, unlike artists)
+    geometries = [parse_path_geometry(path) for path in paths]
+    itempaths = _curv_paths(paths, [item_type for item_type, coords, path_feature in geometries]) if curves else repeat(None)
+    return [(item_type, coords, path_feature, itempath) for (item_type, coords, path_feature), itempath in zip(geometries, itempaths)]
+
+def _parse_geometry_shared(paths, start, spec):
+    # run in worker processes by parse_paths(shared=True): write coords and features of paths[i] to
+    # slot start + i of the shared blocks, and only send back the Path of curves
+    item_types = []
+    with SharedGeometry.attach(spec) as geom:
+        for i, path in enumerate(paths, start=start):
+            item_type, coords, path_feature = parse_path_geometry(path)
+            geom.write(i, item_type, coords, path_feature)
+            item_types.append(item_type)
+    return _curv_paths(paths, item_types)
+
+def parse_paths(paths, workers=None, chunksize=None, skip=None, shared=True, progress=None, cancel=None):
+    '''
+    parse_path for a list of paths, optionally using multiple processes
+
+    Parameters
+    ----------
+    paths : list
+        The paths.
+    workers : int, optional
+        Number of worker processes used to compute the coords and features.
+        If None or 1, everything is done in this process; if -1, use all CPU cores.
+        The artists are always made in this process.
+        The default is None.
+    chunksize : int, optional
+        Number of paths sent to a worker at a time. 
+        If not given, each worker gets about 4 chunks.
+    skip : Iterable of bool, optional
+        If given, paths with True are not parsed, and None is returned for them.
+    shared : bool, optional
+        Only used with multiple workers. If True, workers write coords and features 
+        to shared memory (see ``sharedgeom.SharedGeometry``) instead of pickling them back, 
+        and the returned coords and ``rel_pos`` are numpy views of arrays copied from these blocks at once.
+        Falls back to pickling if shared memory is not available.
+        The default is True.
+    progress : callable, optional
+        Called with the number of paths parsed after each chunk, see ``progress.report``.
+    cancel : progress.CancelToken, optional
+        Checked after each chunk; ``progress.Cancelled`` is raised if cancelled.
+
+    Returns
+    -------
+    parsed : list
+        ``(item_type, coords, artist, path_feature)`` for each path (or None), in the same order as `paths`.
+    '''
+    idx = range(len(paths)) if skip is None else [i for i, s in enumerate(skip) if not s]
+    todo = [paths[i] for i in idx]
+    
+    if workers == -1:
+        workers = os.cpu_count()
+    if workers is None or workers <= 1 or len(todo) < 2:
+        geometries = []
+        chunksize = 1000 if chunksize is None else chunksize
+        report(progress, cancel, 'parsing', 0, len(todo))
+        for i in range(0, len(todo), chunksize):
+            geometries += _parse_geometry_chunk(todo[i:i + chunksize], curves=True)
+            report(progress, cancel, 'parsing', len(geometries), len(todo))
+    else:
+        if chunksize is None:
+            chunksize = max(1, -(-len(todo) // (workers * 4)))
+        starts = range(0, len(todo), chunksize)
+        chunks = [todo[i:i + chunksize] for i in starts]
+        geom = None
+        if shared:
+            try:
+                geom = SharedGeometry.from_counts([max_coords(path) for path in todo])
+            except OSError as e: # e.g., /dev/shm not available
+                warnings.warn(f'shared memory not available ({e}), falling back to pickling')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if geom is None:
+                futures = [executor.submit(_parse_geometry_chunk, chunk, True) for chunk in chunks]
+            else:
+                futures = [executor.submit(_parse_geometry_shared, chunk, start, geom.spec) for chunk, start in zip(chunks, starts)]
+            results = []
+            try:
+                report(progress, cancel, 'parsing', 0, len(todo))
+                for chunk, future in zip(chunks, futures):
+                    results += future.result()
+                    report(progress, cancel, 'parsing', len(results), len(todo))
+            except BaseException: # e.g., cancelled: do not wait for the other chunks
+                for future in futures:
+                    future.cancel()
+                if geom is not None:
+                    geom.close()
+                raise
+            finally:
+                if geom is not None:
+                    geom.unlink()
+            if geom is None:
+                geometries = results
+            else:
+                geom.detach()
+                itempaths = results
+                geometries = []
+                for i, (path, itempath) in enumerate(zip(todo, itempaths)):
+                    item_type = geom.item_type(i)
+                    path_feature = {
+                        'rel_pos': geom.rel_pos(i),
+                        'type': '+'.join(item_type),
+                        'color': np.array(path['color']),
+                        'fill': np.array(path['fill']),
+                        }
+                    geometries.append((item_type, geom.coords(i), path_feature, itempath))
+    
+    parsed = [None] * len(paths)
+    for i, path, (item_type, coords, path_feature, itempath) in iterate(zip(idx, todo, geometries), 'making artists', progress, cancel, total=len(todo)):
+        parsed[i] = item_type, coords, make_artist(path, item_type, coords, itempath=itempath), path_feature
+    return parsed
+
+def plot_path(path, ax):
+    # ax: the Matplotlib Axes to plot on (no pyplot state is used, so figures can be made in different threads)
     item_type, coords, artist, _ = parse_path(path)
     xs, ys = coords
     # if item_type == 'l':
@@ -171,17 +392,19 @@ def plot_path(path, ax=None):
     ax.autoscale()
     ax.invert_yaxis()
     
-def plot_paths(paths, ax=None):
-    if ax is None:
-        ax = plt.gca()
-        
+def plot_paths(paths, ax, workers=None, parsed=None, progress=None, cancel=None):
+    # ax: the Matplotlib Axes to plot on, see plot_path
+    # parsed: results of parse_paths(paths), if already computed (e.g., by precompute.Precomputer)
+    # progress, cancel: see progress.py
     artists = [] # the original artists
     artists_in_plot = [] # the artists made in plot (once an artist is added, it can never be added to somewhere else)
     path_features = []
     unrecognized_paths = []
-    for path in paths:
+    if parsed is None:
+        parsed = parse_paths(paths, workers=workers, progress=progress, cancel=cancel)
+    for path, parsed_path in iterate(zip(paths, parsed), 'plotting', progress, cancel, total=len(paths)):
         try:
-            item_type, coords, artist, path_feature = parse_path(path)
+            item_type, coords, artist, path_feature = parsed_path
         except ValueError:
             raise
             unrecognized_paths.append(path)
@@ -204,6 +427,7 @@ def plot_paths(paths, ax=None):
 
 def get_coords(items, split_broken=True):
     # get points that the shape goes through
+    # points, rects and quads are accessed by index, so that both fitz objects and tuples (see fileio.py) work
     xs = [[]]
     ys = [[]]
     x, y = None, None
@@ -217,13 +441,12 @@ def get_coords(items, split_broken=True):
                 raise NotImplementedError()
             
         elif item[0] == 're': #rectangle
-            rect = item[1]
-            x0, x1, y0, y1 = rect.x0, rect.x1, rect.y0, rect.y1
+            x0, y0, x1, y1 = item[1]
             xs[-1] += [x0, x1, x1, x0, x0]
             ys[-1] += [y0, y0, y1, y1, y0]
         elif item[0] == 'qu': # quad
-            quad = item[1]
-            pts = [quad.ul, quad.ur, quad.lr, quad.ll]
+            ul, ur, ll, lr = item[1]
+            pts = [ul, ur, lr, ll]
         elif item[0] == 'l':
             pts = item[1:]
         else:
@@ -231,7 +454,7 @@ def get_coords(items, split_broken=True):
             
         if item[0] in ['c', 'qu', 'l']:
             for pti, pt in enumerate(pts):
-                if (x, y) == (pt.x, pt.y): # same location as the last point
+                if (x, y) == (pt[0], pt[1]): # same location as the last point
                     continue
                 elif pti == 0 and itemi >= 1: 
                     # the starting point but not the same location as the last point: broken path
@@ -240,7 +463,7 @@ def get_coords(items, split_broken=True):
                     xs.append([])
                     ys.append([])
                     item_idx.append([])
-                x, y = pt.x, pt.y
+                x, y = pt[0], pt[1]
                 xs[-1].append(x)
                 ys[-1].append(y)
         item_idx[-1].append(itemi)
@@ -253,36 +476,42 @@ def get_coords(items, split_broken=True):
 def get_curv_path(items):
     # get matplotlib.path.Path object
     # this should not be used if the item type for a path is only 'l': should treat is as normal Polygon or Line2D
-    path_data = []
-    endx, endy = None, None
-    for item in items:
-        pts = item[1:]
-        # firstcode = Path.LINETO if len(path_data) > 0 else Path.MOVETO
-        firstcode = Path.LINETO if (endx, endy) == (pts[0].x, pts[0].y) else Path.MOVETO
-        if item[0] == 'c': # Bezier curve
-            if len(pts) == 4: # cubic
-                path_data += [
-                    (firstcode, (pts[0].x, pts[0].y)),
-                    (Path.CURVE4, (pts[1].x, pts[1].y)),
-                    (Path.CURVE4, (pts[2].x, pts[2].y)),
-                    (Path.CURVE4, (pts[3].x, pts[3].y)),
-                    ]
-                endx, endy = (pts[3].x, pts[3].y)
-            else:
-                raise NotImplementedError('only implemented cubic Bezier curve')
-        elif item[0] == 'l': # line
-            assert len(pts) == 2
-            path_data += [
-                (firstcode, (pts[0].x, pts[0].y)),
-                (Path.LINETO, (pts[1].x, pts[1].y)),
-                ]
-            endx, endy = (pts[1].x, pts[1].y)
-        else:
-            raise ValueError(f"unexpected item type '{item[0]}'")
+    return get_curv_paths([items])[0]
+
+def get_curv_paths(items_list):
+    # get_curv_path for the items of many paths at once
+    # vertices and codes of all paths are filled as arrays: 4 vertices for each (cubic) Bezier curve and 2 for each
+    # line, the first of which is MOVETO if it is not where the last item of the same path ends, and LINETO otherwise
+    items = [item for items in items_list for item in items]
+    if not items:
+        return [Path(np.empty((0, 2))) for items in items_list] # Path raises for no vertices and codes
+    kinds = [item[0] for item in items]
+    sizes = np.array([len(item) - 1 for item in items], dtype=np.intp)
+    is_curve = np.array([kind == 'c' for kind in kinds], dtype=bool)
+    is_line = np.array([kind == 'l' for kind in kinds], dtype=bool)
+    bad = np.flatnonzero(~(is_curve | is_line) | (sizes != np.where(is_curve, 4, 2)))
+    if len(bad): # raised for the first item that is not supported
+        kind, npts = kinds[bad[0]], sizes[bad[0]]
+        if kind == 'c':
+            raise NotImplementedError('only implemented cubic Bezier curve')
+        elif kind == 'l':
+            assert npts == 2
+        raise ValueError(f"unexpected item type '{kind}'")
+    
+    # points (fitz.Point or tuples, see fileio.py) are iterated as (x, y)
+    verts = np.fromiter(chain.from_iterable(chain.from_iterable(item[1:] for item in items)), dtype=float, 
+                        count=2 * int(sizes.sum())).reshape(-1, 2)
+    codes = np.where(np.repeat(is_curve, sizes), Path.CURVE4, Path.LINETO).astype(Path.code_type)
+    starts = np.cumsum(sizes) - sizes # of each item
+    ends = starts + sizes - 1
+    connected = np.zeros(len(items), dtype=bool)
+    connected[1:] = np.all(verts[starts[1:]] == verts[ends[:-1]], axis=1)
+    item_counts = np.array([len(items) for items in items_list], dtype=np.intp)
+    connected[(np.cumsum(item_counts) - item_counts)[item_counts > 0]] = False # the first item of each path
+    codes[starts] = np.where(connected, Path.LINETO, Path.MOVETO)
     
-    codes, verts = zip(*path_data)
-    path = Path(verts, codes)
-    return path
+    bounds = np.append(starts, len(verts))[np.cumsum(np.append(0, item_counts))].tolist() # vertices of each path
+    return [Path(verts[i0:i1], codes[i0:i1]) for i0, i1 in zip(bounds[:-1], bounds[1:])]
 
 def get_ls(s):
     if s in ["[] 0", None, ""]:
@@ -308,14 +537,43 @@ def minmax_getter(coords):
     y0, y1 = np.min(ys), np.max(ys)
     return (x0 + x1) / 2, (y0 + y1) / 2    
 
-def group_paths(paths, typestr=None, markers=None, marker_getter='mean', mode='typestr'):
-    # marker_getter: method to get the position of the marker if arg `marker` do not contain center information
+def _marker_getter(marker_getter):
     if marker_getter == 'mean': #simply use mean of coords as position
-        marker_getter = mean_getter
+        return mean_getter
     elif marker_getter == 'minmax':
-        marker_getter = minmax_getter
+        return minmax_getter
+    else:
+        raise ValueError(f"unknown marker_getter '{marker_getter}'")
+
+def make_scatter_object(scatter_artists, scatter_coords, path_idxs=None):
+    # a scatter object: a collection of the artists of the markers, and the positions of the markers
+    artists_type = list({type(a) for a in scatter_artists})
+    if len(artists_type) > 1:
+        raise TypeError(f'expected one single type for a collection of scatter, got {artists_type}')
+    artists_type = artists_type[0]
+    if artists_type == Line2D:
+        warnings.warn(f'a group of {len(scatter_artists)} line-like objects marked as scatters')
+        lc_kwargs = { # LineCollection kwargs
+            'linewidths': [l.get_linewidth() for l in scatter_artists],
+            'colors': [to_rgba(l.get_color(), l.get_alpha()) for l in scatter_artists],
+            'linestyles': [l.get_linestyle() for l in scatter_artists],
+            }
+        collection = LineCollection((a.get_xydata() for a in scatter_artists), **lc_kwargs)
     else:
-        return ValueError()
+        collection = PatchCollection(scatter_artists, match_original=True)
+    return {'artist': collection, # todo: what if user mark line as scatter? should disallow it!
+            'coords': np.array(scatter_coords).T,
+            'paths': list(path_idxs)}
+
+def group_paths(paths, typestr=None, markers=None, marker_getter='mean', mode='typestr', workers=None, parsed=None, stitch=None,
+                progress=None, cancel=None):
+    # marker_getter: method to get the position of the marker if arg `marker` do not contain center information
+    # workers: number of processes for parsing paths, see parse_paths
+    # parsed: results of parse_paths(paths), if already computed; their artists must not have been added to any Axes
+    # stitch: if given, lines whose ends coincide within this tolerance (in points) are joined into one object, see stitch.stitch_lines
+    # progress, cancel: see progress.py
+    # each object also has 'paths': the indexes (in `paths`) of the paths it is made of
+    marker_getter = _marker_getter(marker_getter)
     
     if mode == 'typestr': # simply group using typestr
         if typestr is None:
@@ -334,10 +592,15 @@ def group_paths(paths, typestr=None, markers=None, marker_getter='mean', mode='t
         scatter_artists = []
         idx0 = -1
         scatter_coords = []
+        scatter_paths = []
         unrecognized_paths = []
-        for path, typ in zip(paths, typestr):
+        # discarded paths are not parsed, but they still end groups of scatter below
+        all_parsed = parsed if parsed is not None else parse_paths(paths, workers=workers, skip=(typ == 'd' for typ in typestr),
+                                                                   progress=progress, cancel=cancel)
+        for i, (path, typ, path_parsed) in enumerate(iterate(zip(paths, typestr, all_parsed), 'grouping', progress, cancel, total=len(paths))):
             try:
-                item_type, coords, artist, path_feature = parse_path(path)
+                if typ != 'd':
+                    item_type, coords, artist, path_feature = path_parsed
             except ValueError:
                 raise
                 unrecognized_paths.append(path)
@@ -345,43 +608,30 @@ def group_paths(paths, typestr=None, markers=None, marker_getter='mean', mode='t
 
             if typ == 's':
                 idx = select_paths(path_feature, marker_features, match_modes)
-                # if len(idx) != 1:
-                #     pass
-                assert len(idx) == 1, idx
+                if len(idx) != 1: # e.g., identified by an earlier version (see filter.ambiguous_scatters)
+                    raise ValueError(f'element {i} is identified as scatter, but matches {len(idx)} markers instead of one: '
+                                     'please identify the elements again')
                 idx = idx[0]
     
             if scatter and (typ != 's' or idx != idx0): # ends a group of scatter
-                artists_type = list({type(a) for a in scatter_artists})
-                if len(artists_type) > 1:
-                    raise TypeError(f'expected one single type for a collection of scatter, got {artists_type}')
-                artists_type = artists_type[0]
-                if artists_type == Line2D:
-                    warnings.warn(f'a group of {len(scatter_artists)} line-like objects marked as scatters')
-                    lc_kwargs = { # LineCollection kwargs
-                        'linewidths': [l.get_linewidth() for l in scatter_artists],
-                        'colors': [to_rgba(l.get_color(), l.get_alpha()) for l in scatter_artists],
-                        'linestyles': [l.get_linestyle() for l in scatter_artists],
-                        }
-                    collection = LineCollection((a.get_xydata() for a in scatter_artists), **lc_kwargs)
-                else:
-                    collection = PatchCollection(scatter_artists, match_original=True)
-                objects['s'].append({
-                    'artist': collection, # todo: what if user mark line as scatter? should disallow it!
-                    'coords': np.array(scatter_coords).T})
+                objects['s'].append(make_scatter_object(scatter_artists, scatter_coords, scatter_paths))
                 scatter = False
                 idx0 = -1
                 scatter_artists.clear()
                 scatter_coords.clear()
+                scatter_paths.clear()
             
             if typ == 's':
                 scatter = True
                 idx0 = idx
                 scatter_artists.append(artist)
                 scatter_coords.append(marker_getter(coords))
+                scatter_paths.append(i)
     
             elif typ in ['u', 'l', 'o']:
                 objects[typ].append({'artist': artist,
-                                     'coords': coords})
+                                     'coords': coords,
+                                     'paths': [i]})
             elif typ == 'd':
                 continue
                 
@@ -391,13 +641,68 @@ def group_paths(paths, typestr=None, markers=None, marker_getter='mean', mode='t
     else:
         raise ValueError
     
+    if stitch is not None:
+        objects = stitch_lines(objects, tol=stitch)
     return objects
 
-def plot_objects(objects, ax=None):
-    # plot grouped objects
+def fingerprint_objects(paths, typestr, markers, marker_getter='mean', stitch=None):
+    # a hash of what group_paths(paths, typestr, markers, marker_getter, stitch=stitch) depends on, to check whether 
+    # saved object indexes (e.g., a selection, see filter.selection_record) still refer to the same objects
+    # the paths are represented by their types, bounding boxes and numbers of items
+    h = hashlib.sha1()
+    h.update(repr((len(paths), typestr, marker_getter)).encode())
+    if stitch is not None: # so that fingerprints without stitching are unchanged
+        h.update(repr(('stitch', float(stitch))).encode())
+    h.update(json.dumps(markers, default=lambda x: x.tolist() if isinstance(x, np.ndarray) else str(x)).encode())
+    h.update(' '.join(path['type'] for path in paths).encode())
+    h.update(np.array([tuple(path['rect']) for path in paths], dtype=float).tobytes())
+    h.update(np.array([len(path['items']) for path in paths], dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+def rebuild_objects(paths, selection, workers=None, parsed=None):
+    '''
+    the objects of a selection saved by ``filter.selection_record``, made again from the paths
+
+    Only the paths of the selected objects are parsed, so this is much faster than grouping 
+    all paths again. The objects are the same as ``filter.get_filtered_objects`` of the objects 
+    grouped by ``group_paths`` (with the same paths, types and markers).
+
+    Parameters
+    ----------
+    paths : list
+        The paths passed to ``group_paths``.
+    selection : dict
+        The selection, see ``filter.selection_record``.
+    workers : int, optional
+        Number of processes for parsing paths, see ``parse_paths``. The default is None.
+    parsed : list, optional
+        Results of ``parse_paths(paths)``, if already computed.
+    '''
+    marker_getter = _marker_getter(selection['marker_getter'])
+    if parsed is None:
+        needed = np.zeros(len(paths), dtype=bool)
+        for typ_paths in selection['paths'].values():
+            for path_idxs in typ_paths:
+                needed[path_idxs] = True
+        parsed = parse_paths(paths, workers=workers, skip=~needed)
     
-    if ax is None:
-        ax = plt.gca()
+    objects = {}
+    for typ, typ_paths in selection['paths'].items():
+        objects[typ] = []
+        for path_idxs in typ_paths:
+            if typ == 's':
+                objects[typ].append(make_scatter_object([parsed[i][2] for i in path_idxs], 
+                                                        [marker_getter(parsed[i][1]) for i in path_idxs], path_idxs))
+            elif len(path_idxs) > 1: # lines stitched together, in order
+                objects[typ].append(make_line_object([parsed[i][2] for i in path_idxs], [parsed[i][1] for i in path_idxs], path_idxs))
+            else:
+                i, = path_idxs
+                item_type, coords, artist, path_feature = parsed[i]
+                objects[typ].append({'artist': artist, 'coords': coords, 'paths': [i]})
+    return objects
+
+def plot_objects(objects, ax):
+    # plot grouped objects on the Matplotlib Axes ax, see plot_path
     
     for typ, typ_objs in objects.items():
         for obj in typ_objs:
@@ -406,3 +711,82 @@ def plot_objects(objects, ax=None):
     ax.autoscale()
     ax.invert_yaxis()
 
+def add_backdrop(ax, image, extent, alpha=.4):
+    # show a rendered page (see fileio.render_page) below all artists, without changing the limits of ax
+    # it is only a picture: elements in it cannot be picked or selected
+    xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    im = ax.imshow(image, extent=extent, origin='upper', aspect='auto', alpha=alpha, zorder=-10, interpolation='antialiased')
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    return im
+
+class ObjectView():
+    '''
+    Draw grouped objects with a few collections, and show or hide them with boolean masks.
+
+    Lines and patches of each type are drawn as one ``LineCollection`` and one ``PatchCollection``
+    (sharing the data of the objects, which are not changed, so that they can still be plotted 
+    elsewhere); other artists (e.g., collections of scatters) are drawn as shallow copies. 
+    Hiding objects sets the alpha of their colors to 0, so no artist is made or removed.
+
+    Parameters
+    ----------
+    objects : dict
+        Grouped objects, see ``group_paths``.
+    ax : Axes
+        The Matplotlib Axes.
+    '''
+
+    def __init__(self, objects, ax):
+        self.ax = ax
+        self.parts = {} # type: [(artist, indexes of the objects, face colors, edge colors)]
+        self.masks = {}
+        for typ, typ_objs in objects.items():
+            self.parts[typ] = []
+            self.masks[typ] = np.full(len(typ_objs), True, dtype=bool)
+            artists = [obj['artist'] for obj in typ_objs]
+            lines = np.array([i for i, a in enumerate(artists) if isinstance(a, Line2D)], dtype=int)
+            patches = np.array([i for i, a in enumerate(artists) if isinstance(a, Patch)], dtype=int)
+            if lines.size:
+                collection = LineCollection(
+                    [artists[i].get_xydata() for i in lines],
+                    colors=[to_rgba(artists[i].get_color(), artists[i].get_alpha()) for i in lines],
+                    linewidths=[artists[i].get_linewidth() for i in lines],
+                    linestyles=[artists[i].get_linestyle() for i in lines])
+                self._add_part(typ, collection, lines)
+            if patches.size:
+                self._add_part(typ, PatchCollection([artists[i] for i in patches], match_original=True), patches)
+            for i in np.setdiff1d(np.arange(len(artists)), np.r_[lines, patches]):
+                self._add_part(typ, copy(artists[i]), np.array([i]))
+        
+        ax.autoscale()
+        ax.invert_yaxis()
+    
+    def _add_part(self, typ, artist, idxs):
+        add(self.ax, artist)
+        if len(idxs) > 1: # a collection of the objects
+            fc, ec = ([[0, 0, 0, 0]] if len(c) == 0 else c for c in [artist.get_facecolor(), artist.get_edgecolor()]) # no color: 'none'
+            fc = np.broadcast_to(fc, (len(idxs), 4)).copy()
+            ec = np.broadcast_to(ec, (len(idxs), 4)).copy()
+        else:
+            fc = ec = None
+        self.parts[typ].append((artist, idxs, fc, ec))
+    
+    def set_visible(self, masks):
+        # show objects where masks ({type: boolean array}) are True, and hide the others
+        for typ, mask in masks.items():
+            mask = np.asarray(mask, dtype=bool)
+            for artist, idxs, fc, ec in self.parts[typ]:
+                shown = mask[idxs]
+                if np.array_equal(shown, self.masks[typ][idxs]):
+                    continue
+                if fc is None:
+                    artist.set_visible(shown[0])
+                else:
+                    fc, ec = fc.copy(), ec.copy()
+                    fc[~shown, 3] = 0
+                    ec[~shown, 3] = 0
+                    artist.set_facecolor(fc)
+                    artist.set_edgecolor(ec)
+            self.masks[typ] = mask.copy()
+
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+calibration and export of grouped objects, without any user interface
+(used by ``mplui.DataExtractor`` and by the batch runner)
+"""
+
+import numpy as np
+from .filter import build_vertex_index, rect_select_indexed
+from .drawing import get_color
+from .utils import dedup
+from .simplify import rdp
+from .resample import resample_lines, common_grid
+from . import __version__
+
+class ConsistencyError(Exception):
+    pass
+
+class DataExporter():
+    '''
+    Calibrate and export the data of grouped objects (see ``drawing.group_paths``)
+    with the data axes saved by ``mplui.DataExtractor``.
+
+    Parameters
+    ----------
+    objects : dict
+        Grouped objects.
+    simplify : float, optional
+        Tolerance for simplifying exported lines, see ``simplify.rdp``. The default is None (not simplified).
+    simplify_units : str, optional
+        'page' (points of the page) or 'data' (data units, or decades for log axes). The default is 'page'.
+    index : dict, optional
+        Vertex index of the lines and scatters of `objects` (see ``filter.build_vertex_index``), if already built.
+    resample : int, optional
+        If given, the lines of each axis are also resampled onto a common grid of this many x, evenly spaced 
+        (in the axis scale) over their range; see ``resample.resample_lines``. The default is None.
+    '''
+    def __init__(self, objects, simplify=None, simplify_units='page', index=None, resample=None):
+        self.init_export(objects, simplify=simplify, simplify_units=simplify_units, index=index, resample=resample)
+    
+    def init_export(self, objects, simplify=None, simplify_units='page', index=None, resample=None):
+        if simplify_units not in ['page', 'data']:
+            raise ValueError(f"unknown simplify_units '{simplify_units}'")
+        self.objects = objects
+        self.simplify = simplify
+        self.simplify_units = simplify_units
+        self.simplify_stats = None # (points dropped, total points, max deviation) of the last collect_data
+        self.resample = resample
+        
+        self.export_data = {
+            'meta': {
+                'vpextractor_version': __version__,
+                'axes': {}, # scales of each axis
+                },
+            }
+        if simplify is not None:
+            self.export_data['meta']['simplify'] = {'tolerance': simplify, 'units': simplify_units, 'axes': {}}
+        
+        # the objects do not change once loaded, so index their vertices once for all axes
+        self.index = build_vertex_index(self.objects, types=['l', 's']) if index is None else index
+        self.infos = {typ: [None] * len(self.objects[typ]) for typ in ['l', 's']} # cache of get_info()
+    
+    scale_func = {
+        'linear': lambda x: x,
+        'log': np.log10,
+        } 
+    scale_inv_func = {
+        'linear': lambda x: x,
+        'log': lambda x: 10**np.array(x),
+        } 
+
+    @classmethod
+    def get_coeffs_auto(cls, xs, xds, err=1e-5):
+        if len(xs) != len(xds):
+            raise ValueError('expected xs, xds with the same shape')
+        if len(xs) < 2:
+            return None, None, None
+        
+        # TODO: support interpolation calibration?
+        # automatically choose linear or log scale, and check consistency 
+        for scale, xfunc in cls.scale_func.items():
+            ks = np.diff(xfunc(xds)) / np.diff(xs)
+            
+            # 1: unique
+            # k = np.unique(ks)
+            # if k.size == 1:
+            #     k = k[0]
+            #     b = xds[0] - k * xs[0]
+            #     return k, b, scale
+                
+            # 2: allow error
+            k = np.mean(ks)
+            if (np.max(ks) - np.min(ks)) / np.abs(k) < err:
+                b = np.mean(xfunc(xds)[:-1] - ks * xs[:-1])
+                return k, b, scale
+                
+        else:
+            raise ConsistencyError(f"inconsistent data: {xs} and {xds}")
+    
+    @classmethod
+    def get_calibration(cls, axis):
+        # calibration of a data axis dict, ((xk, xb, xscale), (yk, yb, yscale)); scales are None if not calibrated
+        # raises ConsistencyError if the calibration is inconsistent
+        return (cls.get_coeffs_auto(axis['x_cal']['pos'], axis['x_cal']['data']),
+                cls.get_coeffs_auto(axis['y_cal']['pos'], axis['y_cal']['data']))
+    
+    @classmethod
+    def apply_calibration(cls, x, y, calib):
+        (xk, xb, xscale), (yk, yb, yscale) = calib
+        x, y = np.array(x), np.array(y)
+        func = cls.scale_inv_func
+        return [func[xscale](xk * x + xb),
+                func[yscale](yk * y + yb)]
+        
+    @staticmethod
+    def get_coeffs(x1, x2, xd1, xd2, scale='linear'):
+        if scale == 'linear':
+            pass
+        elif scale == 'log':
+            x1, x2 = np.log10(x1), np.log(x2)
+        else:
+            raise ValueError(f"unknown scale '{scale}'")
+        
+        k = (xd2 - xd1) / (x2 - x1)
+        b = xd1 - k * x1
+    
+        return k, b
+    
+    def get_info(self, typ, i):
+        # style information of an object, computed once
+        if self.infos[typ][i] is None:
+            artist = self.objects[typ][i]['artist']
+            info = {'linestyle': dedup(artist.get_linestyle()),
+                    'linewidth': dedup(artist.get_linewidth())}
+            info.update(get_color(artist))
+            # if typ == 's':
+            #     info.update({'s': artist.get_sizes()})
+            self.infos[typ][i] = info
+        return self.infos[typ][i]
+    
+    def collect_data(self, selected, calib):
+        # calibrated data of selected objects: coordinates of all objects of the same type are transformed at once
+        out_data = {'l': [], 's': []}
+        out_info = {'l': [], 's': []}
+        self.simplify_stats = None
+        
+        for typ in ['l', 's']: # line, scatter
+            idxs = np.flatnonzero(selected[typ])
+            if idxs.size == 0:
+                continue
+            xs = [np.ravel(self.objects[typ][i]['coords'][0]) for i in idxs]
+            ys = [np.ravel(self.objects[typ][i]['coords'][1]) for i in idxs]
+            sizes = np.array([x.size for x in xs])
+            x, y = np.concatenate(xs), np.concatenate(ys)
+            if typ == 'l' and self.simplify is not None:
+                x, y, sizes = self.simplify_lines(x, y, sizes, calib)
+            x, y = self.__class__.apply_calibration(x, y, calib)
+            splits = np.cumsum(sizes)[:-1]
+            for i, xd, yd in zip(idxs, np.split(x, splits), np.split(y, splits)):
+                out_data[typ].append([xd, yd])
+                out_info[typ].append(self.get_info(typ, i))
+        
+        return out_data, out_info
+    
+    def simplify_lines(self, x, y, sizes, calib):
+        # simplify lines concatenated in x, y (page coordinates) with `sizes` points each
+        if self.simplify_units == 'page':
+            sx, sy = x, y
+        else: # distances in calibrated data before applying the scale (i.e., decades for log axes)
+            (xk, xb, _), (yk, yb, _) = calib
+            sx, sy = xk * x + xb, yk * y + yb
+        starts = np.cumsum(sizes) - sizes
+        keep, max_deviation = rdp(sx, sy, self.simplify, starts=starts[sizes > 0]) # empty lines have no start
+        self.simplify_stats = (int(keep.size - keep.sum()), int(keep.size), max_deviation)
+        line_of = np.repeat(np.arange(sizes.size), sizes)
+        return x[keep], y[keep], np.bincount(line_of[keep], minlength=sizes.size)
+    
+    @staticmethod
+    def resample_entry(entry, num, calib):
+        # the lines of an export entry on a common grid: 'x' (the grid), 'y' (one row for each monotonic run of a line), 
+        # and 'lines' (the index in entry['lines'] of each row)
+        (_, _, xscale), (_, _, yscale) = calib
+        xs = [line['x'] for line in entry['lines']]
+        grid = common_grid(xs, num=num, scale=xscale)
+        y, lines = resample_lines(xs, [line['y'] for line in entry['lines']], grid, xscale=xscale, yscale=yscale)
+        return {'x': grid, 'y': y, 'lines': lines}
+    
+    @staticmethod
+    def get_export_entry(out_data, out_info):
+        entry = {'lines': [], 'scatters': []}
+        typecode_translate = {'l': 'lines', 's': 'scatters'}
+        
+        for typ in ['l', 's']:
+            for data_coords, info in zip(out_data[typ], out_info[typ]):
+                export_dict = {
+                    'x': data_coords[0],
+                    'y': data_coords[1],
+                    }
+                export_dict.update(info)
+                entry[typecode_translate[typ]].append(export_dict)
+        return entry
+
+    
+    def export_axes(self, axes):
+        # export data of all calibrated data axes (dict of data axis dicts) into self.export_data
+        # all axes share the vertex index, so each axis costs one region query 
+        # plus one vectorized transform
+        for key, axis in axes.items():
+            try:
+                calib = self.__class__.get_calibration(axis)
+            except ConsistencyError as e:
+                print(f'axis #{key} not exported: {e}')
+                continue
+            if calib[0][2] is None or calib[1][2] is None: # not calibrated yet
+                continue
+            x0, x1 = axis['xlim']
+            y0, y1 = axis['ylim']
+            selected = rect_select_indexed(self.index, x0, x1, y0, y1)
+            out_data, out_info = self.collect_data(selected, calib)
+            self.export_data[key] = self.get_export_entry(out_data, out_info)
+            self.export_data['meta']['axes'][key] = {'xscale': calib[0][2], 'yscale': calib[1][2]}
+            if self.resample is not None:
+                self.export_data[key]['resampled'] = self.resample_entry(self.export_data[key], self.resample, calib)
+            if self.simplify_stats is not None:
+                dropped, total, max_deviation = self.simplify_stats
+                print(f'axis #{key}: {dropped} of {total} line points dropped by simplification, max deviation {max_deviation:.3g} ({self.simplify_units} units)')
+                self.export_data['meta']['simplify']['axes'][key] = {
+                    'dropped': dropped, 'points': total, 'max_deviation': max_deviation}
+        return self.export_data
@@ -5,23 +5,105 @@ Created on Thu Jan 18 15:24:50 2024
 @author: Yu-Chen Wang
 """
 
-from .utils import save_pickle, load_pickle
+from .utils import save_pickle
 from .drawing import split_broken_paths
+from .progress import iterate, report
 
-import fitz
+import numpy as np
+# fitz (and svgio, which needs it) is imported in pdf2drawings and render_page, so that loading drawings does not need it
 
 #%%
-def pdf2drawings(pdf_path, out_path=None, page=0, split_broken_path=False):
+def in_clip(rect, clip):
+    # whether the bounding box `rect` (x0, y0, x1, y1) overlaps with the `clip` rectangle
+    x0, y0, x1, y1 = clip
+    return rect[0] <= x1 and rect[2] >= x0 and rect[1] <= y1 and rect[3] >= y0
+
+# keys that get_drawings() adds (with None) if missing in fill-only or stroke-only paths
+_allkeys = ('closePath', 'fill', 'color', 'width', 'lineCap', 'lineJoin', 'dashes', 'stroke_opacity', 'fill_opacity', 'even_odd')
+
+def get_drawings_raw(page, clip=None):
+    '''
+    the same as ``page.get_drawings()``, but built from the low-level ``page.get_cdrawings()``. 
+    Points, rectangles and quads are kept as plain tuples instead of being converted to 
+    ``fitz.Point``/``fitz.Rect``/``fitz.Quad`` objects, and the clip region is applied to all
+    bounding boxes at once before anything else is done with the paths.
+    '''
+    paths = page.get_cdrawings()
+    
+    if clip is not None and paths:
+        x0, y0, x1, y1 = clip
+        rects = np.array([path['rect'] for path in paths], dtype=float)
+        keep = (rects[:, 0] <= x1) & (rects[:, 2] >= x0) & (rects[:, 1] <= y1) & (rects[:, 3] >= y0)
+        paths = [paths[i] for i in np.flatnonzero(keep)]
+    
+    for path in paths:
+        items = path['items']
+        for i, item in enumerate(items):
+            if item[0] == 're': # get_drawings() normalizes rectangles
+                rx0, ry0, rx1, ry1 = item[1]
+                items[i] = ('re', (min(rx0, rx1), min(ry0, ry1), max(rx0, rx1), max(ry0, ry1)), item[2])
+        if path['type'] in ('f', 's'):
+            for key in _allkeys:
+                path.setdefault(key, None)
+    return paths
+
+def pdf2drawings(pdf_path, out_path=None, page=0, split_broken_path=False, native_svg=False, clip=None, backend='auto', yes=False,
+                 progress=None, cancel=None):
+    # native_svg: if True, SVG files are read directly by `svgio` instead of being rendered by fitz (faster for large files,
+    #     but the coordinates may differ slightly from those given by fitz, which are single-precision)
+    # clip: (x0, y0, x1, y1) in page coordinates; if given, paths whose bounding boxes are outside it are dropped
+    # backend: 'raw' (get_drawings_raw), 'fitz' (page.get_drawings), or 'auto' ('raw' if supported by the installed PyMuPDF)
+    # out_path: if False, the drawings are only returned, not saved
+    # progress, cancel: see progress.py; the drawings of a PDF page are extracted by PyMuPDF at once, so they are 
+    #     only reported before and after that, while those of SVG files are reported as they are read
     if out_path is None:
         out_path = pdf_path + '.drw'
-    with fitz.open(pdf_path) as doc:
-        page = doc[page]
-        paths = page.get_drawings()
+    if native_svg and pdf_path.lower().endswith('.svg'):
+        from .svgio import iter_svg_drawings
+        paths = iterate(iter_svg_drawings(pdf_path), 'reading', progress, cancel)
+        if clip is not None: # dropped while streaming
+            paths = (path for path in paths if in_clip(path['rect'], clip))
+        paths = list(paths)
+    else:
+        import fitz
+        report(progress, cancel, 'extracting', 0, 1)
+        with fitz.open(pdf_path) as doc:
+            page = doc[page]
+            if backend == 'auto':
+                backend = 'raw' if hasattr(page, 'get_cdrawings') else 'fitz'
+            if backend == 'raw':
+                paths = get_drawings_raw(page, clip=clip)
+            elif backend == 'fitz':
+                paths = page.get_drawings()
+                if clip is not None:
+                    paths = [path for path in paths if in_clip(path['rect'], clip)]
+            else:
+                raise ValueError(f"unknown backend '{backend}'")
+        report(progress, cancel, 'extracting', 1, 1)
     
     if split_broken_path:
-        paths = split_broken_paths(paths) 
+        paths = split_broken_paths(paths, progress=progress, cancel=cancel)
     
-    save_pickle(out_path, paths)
+    if out_path is not False:
+        save_pickle(out_path, paths, yes=yes)
     return paths
 
+def render_page(pdf_path, page=0, dpi=72):
+    '''
+    render a page to an image (e.g., as a backdrop of the UIs, see drawing.add_backdrop)
 
+    Returns
+    -------
+    image : numpy.ndarray
+        RGB image of shape (height, width, 3).
+    extent : tuple
+        (x0, x1, y1, y0) of the page in page coordinates (origin at the top-left corner, as the drawings), 
+        which is the `extent` of ``imshow`` for the image.
+    '''
+    import fitz
+    with fitz.open(pdf_path) as doc:
+        page = doc[page]
+        pix = page.get_pixmap(dpi=dpi, alpha=False)
+        image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n).copy()
+        rect = page.rect
+    return image, (rect.x0, rect.x1, rect.y1, rect.y0)
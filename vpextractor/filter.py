@@ -9,6 +9,7 @@ helper functions for filtering out not useful elements
 
 import numpy as np
 from itertools import repeat
+from matplotlib.path import Path
 
 def eq(ar0, ar1, eta=1e-2):
     ar0 = np.array(ar0)
@@ -33,6 +34,14 @@ def select_paths(target_feature, path_features, modes='s'):
         idx.append(i)
     return idx
 
+def ambiguous_scatters(types, path_features, markers):
+    # indexes of paths identified as scatter ('s' in types) that do not match exactly one of the markers
+    # (see mplui.ElementIdentifier.known_markers), which drawing.group_paths cannot group
+    types = np.frombuffer(types.encode(), dtype='S1') if isinstance(types, str) else np.asarray(types, dtype='S1')
+    features = [marker['feature'] for marker in markers]
+    modes = [marker['match_by'] for marker in markers]
+    return [i for i in np.flatnonzero(types == b's') if len(select_paths(path_features[i], features, modes)) != 1]
+
 def rect_filter_objects(objects, x0, x1, y0, y1, mode='touch'):
     # objects is of format the same as that in `drawing.py`
     # filter with rectangle
@@ -61,3 +70,186 @@ def get_filtered_objects(objects, selection):
             filtered_objects[typ].append(typ_objs[idx])
     
     return filtered_objects
+
+def selection_record(objects, selection, fingerprint, marker_getter='mean'):
+    # what is saved for a selection: the indexes of the selected objects of each type, and the 
+    # paths they are made of (see drawing.group_paths), instead of the objects themselves
+    # fingerprint: see drawing.fingerprint_objects; objects can be made again by drawing.rebuild_objects
+    return {
+        'fingerprint': fingerprint,
+        'marker_getter': marker_getter,
+        'counts': {typ: len(typ_objs) for typ, typ_objs in objects.items()},
+        'selected': {typ: np.flatnonzero(selection[typ]).tolist() for typ in objects},
+        'paths': {typ: [[int(i) for i in typ_objs[idx]['paths']] for idx in np.flatnonzero(selection[typ])]
+                  for typ, typ_objs in objects.items()},
+        }
+
+def build_vertex_index(objects, types=None):
+    # flatten the vertices of all objects into arrays sorted by x, so that 
+    # rectangle queries only need a binary search plus a check on the x-slice
+    # objects are also numbered across types (starting from 'first' of each type), 
+    # with the number of vertices, bounding box (x0, x1, y0, y1) and centroid of each of them
+    if types is None:
+        types = list(objects.keys())
+    
+    xs, ys, typ_codes, obj_idxs = [], [], [], []
+    for t, typ in enumerate(types):
+        for i, obj in enumerate(objects[typ]):
+            x, y = obj['coords']
+            x, y = np.ravel(x).astype(float), np.ravel(y).astype(float)
+            xs.append(x)
+            ys.append(y)
+            typ_codes.append(np.full(x.size, t, dtype=np.int8))
+            obj_idxs.append(np.full(x.size, i, dtype=np.int64))
+    
+    sizes = np.array([x.size for x in xs], dtype=np.int64)
+    if xs:
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        typ_codes, obj_idxs = np.concatenate(typ_codes), np.concatenate(obj_idxs)
+    else:
+        xs, ys = np.empty(0), np.empty(0)
+        typ_codes, obj_idxs = np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int64)
+    
+    # per-object values; objects without vertices get nan
+    bounds = np.full((sizes.size, 4), np.nan)
+    centroids = np.full((sizes.size, 2), np.nan)
+    nonempty = np.flatnonzero(sizes)
+    if nonempty.size:
+        starts = (np.cumsum(sizes) - sizes)[nonempty]
+        bounds[nonempty] = np.column_stack([np.minimum.reduceat(xs, starts), np.maximum.reduceat(xs, starts),
+                                            np.minimum.reduceat(ys, starts), np.maximum.reduceat(ys, starts)])
+        centroids[nonempty] = np.column_stack([np.add.reduceat(xs, starts), np.add.reduceat(ys, starts)]) / sizes[nonempty, None]
+    counts = [len(objects[typ]) for typ in types]
+    
+    order = np.argsort(xs, kind='stable')
+    return {
+        'types': list(types),
+        'counts': dict(zip(types, counts)),
+        'first': np.cumsum([0] + counts[:-1]).astype(np.int64),
+        'x': xs[order],
+        'y': ys[order],
+        'typ': typ_codes[order],
+        'obj': obj_idxs[order],
+        'sizes': sizes,
+        'bounds': bounds,
+        'centroids': centroids,
+        }
+
+def subset_vertex_index(index, selection, types=None):
+    # the index of get_filtered_objects(objects, selection), from the index of objects built by build_vertex_index, 
+    # without sorting again
+    if types is None:
+        types = index['types']
+    
+    keep = np.zeros(index['x'].size, dtype=bool)
+    typ_codes = np.empty_like(index['typ'])
+    obj_idxs = np.empty_like(index['obj'])
+    objs = [] # the objects kept, numbered across types
+    for t, typ in enumerate(types):
+        old_t = index['types'].index(typ)
+        selected = np.asarray(selection[typ], dtype=bool)
+        new_idxs = np.cumsum(selected) - 1
+        rows = np.flatnonzero(index['typ'] == old_t)
+        rows = rows[selected[index['obj'][rows]]]
+        keep[rows] = True
+        typ_codes[rows] = t
+        obj_idxs[rows] = new_idxs[index['obj'][rows]]
+        objs.append(index['first'][old_t] + np.flatnonzero(selected))
+    objs = np.concatenate(objs) if objs else np.empty(0, dtype=np.int64)
+    counts = [int(np.count_nonzero(selection[typ])) for typ in types]
+    
+    return {
+        'types': list(types),
+        'counts': dict(zip(types, counts)),
+        'first': np.cumsum([0] + counts[:-1]).astype(np.int64),
+        'x': index['x'][keep],
+        'y': index['y'][keep],
+        'typ': typ_codes[keep],
+        'obj': obj_idxs[keep],
+        'sizes': index['sizes'][objs],
+        'bounds': index['bounds'][objs],
+        'centroids': index['centroids'][objs],
+        }
+
+def _split_types(index, hit):
+    # per-type boolean arrays from a boolean array of objects numbered across types
+    return {typ: hit[first:first + index['counts'][typ]] for typ, first in zip(index['types'], index['first'])}
+
+def _select_in_region(index, x0, x1, y0, y1, contains=None, mode='touch'):
+    # objects selected by a region inside the rectangle x0..x1, y0..y1 (its bounding box)
+    # contains(x, y): whether points in the bounding box are in the region; None if the region is the rectangle
+    # only objects (for 'contain' and 'centroid') or vertices (for 'touch') in the bounding box are checked with `contains`
+    hit = np.zeros(index['sizes'].size, dtype=bool)
+    if mode == 'centroid':
+        cx, cy = index['centroids'].T
+        with np.errstate(invalid='ignore'):
+            candidates = np.flatnonzero((x0 <= cx) & (cx <= x1) & (y0 <= cy) & (cy <= y1))
+        hit[candidates] = True if contains is None else contains(cx[candidates], cy[candidates])
+    elif mode in ['touch', 'contain']:
+        start = np.searchsorted(index['x'], x0, side='left')
+        stop = np.searchsorted(index['x'], x1, side='right')
+        y = index['y'][start:stop]
+        rows = start + np.flatnonzero((y0 <= y) & (y <= y1))
+        objs = index['first'][index['typ'][rows]] + index['obj'][rows]
+        if mode == 'contain': # objects inside the bounding box
+            bx0, bx1, by0, by1 = index['bounds'].T
+            inbox = (x0 <= bx0) & (bx1 <= x1) & (y0 <= by0) & (by1 <= y1)
+            rows, objs = rows[inbox[objs]], objs[inbox[objs]]
+        if contains is not None:
+            objs = objs[contains(index['x'][rows], index['y'][rows])]
+        count = np.bincount(objs, minlength=hit.size)
+        hit = count >= index['sizes'] if mode == 'contain' else count > 0
+        hit &= index['sizes'] > 0
+    else:
+        raise ValueError(f"unknown mode '{mode}'")
+    return _split_types(index, hit)
+
+def rect_select_indexed(index, x0, x1, y0, y1, mode='touch'):
+    # same as rect_filter_objects(..., mode='touch'), but using an index built by build_vertex_index
+    # mode: 'touch' (any vertex in the rectangle), 'contain' (all vertices) or 'centroid' (the mean of the vertices)
+    return _select_in_region(index, x0, x1, y0, y1, mode=mode)
+
+def polygon_select_indexed(index, polygon, mode='touch'):
+    # objects selected by a polygon (N x 2 vertices, e.g., drawn with a lasso), see rect_select_indexed for modes
+    polygon = np.asarray(polygon, dtype=float)
+    if len(polygon) < 3:
+        return _split_types(index, np.zeros(index['sizes'].size, dtype=bool))
+    (x0, y0), (x1, y1) = polygon.min(axis=0), polygon.max(axis=0)
+    def contains(x, y):
+        return points_in_polygon(polygon, x, y)
+    return _select_in_region(index, x0, x1, y0, y1, contains=contains, mode=mode)
+
+def points_in_polygon(polygon, x, y, cells=64):
+    # same as Path(polygon).contains_points, but for many points, the bounding box of the polygon is divided into 
+    # cells x cells; only points in cells crossed by the polygon are checked, and the others take the result of 
+    # the center of their cell
+    path = Path(polygon, closed=False)
+    if x.size < 4 * cells**2:
+        return path.contains_points(np.column_stack([x, y]))
+    (x0, y0), (x1, y1) = polygon.min(axis=0), polygon.max(axis=0)
+    w, h = (x1 - x0) / cells or 1., (y1 - y0) / cells or 1.
+    
+    # cells crossed by the edges: any point of an edge is within half a cell of a sample, i.e., in the cell of the sample or a neighbor
+    p0, p1 = polygon, np.roll(polygon, -1, axis=0)
+    steps = np.ceil(2 * np.maximum(np.abs(p1[:, 0] - p0[:, 0]) / w, np.abs(p1[:, 1] - p0[:, 1]) / h)).astype(int) + 1
+    edge = np.repeat(np.arange(len(polygon)), steps + 1)
+    t = np.arange(edge.size) - np.repeat(np.cumsum(steps + 1) - steps - 1, steps + 1)
+    t = (t / steps[edge])[:, None]
+    samples = p0[edge] * (1 - t) + p1[edge] * t
+    crossed = np.zeros((cells + 2, cells + 2), dtype=bool) # with a margin of one cell on each side
+    ci = np.clip(np.floor((samples[:, 0] - x0) / w).astype(int), 0, cells - 1) + 1
+    cj = np.clip(np.floor((samples[:, 1] - y0) / h).astype(int), 0, cells - 1) + 1
+    for di in [-1, 0, 1]:
+        for dj in [-1, 0, 1]:
+            crossed[ci + di, cj + dj] = True
+    crossed = crossed[1:-1, 1:-1]
+    
+    centers = np.stack(np.meshgrid(x0 + (np.arange(cells) + .5) * w, y0 + (np.arange(cells) + .5) * h, indexing='ij'), axis=-1)
+    inside = path.contains_points(centers.reshape(-1, 2)).reshape(cells, cells)
+    
+    pi = np.clip(np.floor((x - x0) / w).astype(int), 0, cells - 1)
+    pj = np.clip(np.floor((y - y0) / h).astype(int), 0, cells - 1)
+    result = inside[pi, pj]
+    check = np.flatnonzero(crossed[pi, pj])
+    result[check] = path.contains_points(np.column_stack([x[check], y[check]]))
+    return result
@@ -8,21 +8,37 @@ general UIs
 """
 
 import matplotlib.pyplot as plt
-from .drawing import plot_paths, group_paths, plot_objects
+from .drawing import plot_paths, group_paths, plot_objects, remove_duplicate_paths, fingerprint_objects, rebuild_objects, add_backdrop
 import os
-from .fileio import pdf2drawings, load_pickle, save_pickle
+import numpy as np
+from .fileio import pdf2drawings, render_page
+from .store import open_store
+from .markerlib import MarkerLibrary
+from .precompute import Precomputer
+from .progress import ProgressLine
+from .filter import subset_vertex_index, selection_record, get_filtered_objects
+from .revision import match_paths, carry_types, carry_selection
 from .mplui import ElementIdentifier, DataExtractor, RectObjectSelector, ObjectChecker
-from .utils import pause_and_warn
+from .utils import pause_and_warn, positive_float
 # from copy import deepcopy
 import logging
 from argparse import ArgumentParser
-plt.style.use('vpextractor.disable_key')
+
+_style_used = False
+
+def use_style():
+    # disable the default key bindings of Matplotlib, which conflict with ours; done before the first UI is shown
+    global _style_used
+    if not _style_used:
+        plt.style.use('vpextractor.disable_key')
+        _style_used = True
 
 class EmptyPathError(Exception):
     '''The `paths` is empty.'''
     pass
 
 def element_checker(paths):
+    use_style()
     fig, ax = plt.subplots()
     artists, artists_in_plot, path_features = plot_paths(paths, ax=ax)
     
@@ -31,30 +47,61 @@ def element_checker(paths):
         oc.wait()
     
 
-def element_identifier(paths):
+def element_identifier(paths, workers=None, library=None, parsed=None, path_signatures=None, backdrop=None, known=None, only=None):
+    # library: markerlib.MarkerLibrary used to classify elements before showing the rest to the user
+    # known: (types, known_markers) of elements already identified (e.g., carried over from an earlier version of the figure, 
+    #     see revision.carry_types), which are not shown; if given, the library is not used to classify elements
+    # only: boolean mask of the elements to identify (e.g., new elements), see mplui.ElementIdentifier
+    # parsed, path_signatures: results of drawing.parse_paths and markerlib.feature_signatures, if already computed
+    # backdrop: (image, extent) of the rendered page (see fileio.render_page) shown below the elements, see drawing.add_backdrop
+    use_style()
     fig, ax = plt.subplot_mosaic(
         [['main', 'marker'],
          ['main', 'group']],
         width_ratios=[5, 3], height_ratios=[5-3, 3])
     # ax['group'].set_title('')
     
-    artists, artists_in_plot, path_features = plot_paths(paths, ax=ax['main'])
+    artists, artists_in_plot, path_features = plot_paths(paths, ax=ax['main'], workers=workers, parsed=parsed)
     
-    with ElementIdentifier(fig=fig, ax=ax, artists=artists, artists_in_plot=artists_in_plot, path_features=path_features) as ei:
-        plt.show()
-        ei.wait()
+    types = known_markers = None
+    if known is not None:
+        types, known_markers = known
+        print(f'{np.count_nonzero(types != b"u")} of {len(types)} elements already identified')
+    elif library is not None:
+        types, known_markers = library.classify(path_features, path_signatures=path_signatures)
+        print(f'{np.count_nonzero(types != b"u")} of {len(types)} elements identified with the marker library "{library.path}"')
+    
+    with ElementIdentifier(fig=fig, ax=ax, artists=artists, artists_in_plot=artists_in_plot, path_features=path_features,
+                           types=types, known_markers=known_markers, only=only) as ei:
+        if backdrop is not None:
+            add_backdrop(ax['main'], *backdrop)
+        if ei.artists:
+            plt.show()
+            ei.wait()
+        else: # nothing left to identify
+            plt.close(fig)
+            ei.finished = True
     return ei
 
-def data_filter(objects):
+def data_filter(objects, index=None, backdrop=None, selected=None):
+    # index: vertex index of the objects, or a Future of it, see mplui.RectObjectSelector
+    # selected: boolean masks of the objects selected at first (default: all), see mplui.RectObjectSelector
+    # backdrop: see element_identifier
+    use_style()
     fig, ax = plt.subplots()
     
     # plot_objects(deepcopy(objects))
-    with RectObjectSelector(fig=fig, objects=objects, ax=ax) as ros:
+    with RectObjectSelector(fig=fig, objects=objects, ax=ax, index=index, selected=selected) as ros:
+        if backdrop is not None:
+            add_backdrop(ax, *backdrop)
         plt.show()
         ros.wait()
     return ros
     
-def data_extractor(objects, pdf_path=None):
+def data_extractor(objects, pdf_path=None, simplify=None, simplify_units='page', store=None, page=0, index=None, backdrop=None,
+                   resample=None):
+    # backdrop: see element_identifier
+    use_style()
     # fig, ax = plt.subplots(1, 2)
     # fig.add_axes((0.1, 0.05, 0.4, 0.075))
     fig, ax = plt.subplot_mosaic(
@@ -65,56 +112,179 @@ def data_extractor(objects, pdf_path=None):
     fig.suptitle('\n')
     plt.tight_layout()
     
-    with DataExtractor(fig=fig, objects=objects, ax0=ax['main'], ax1=ax['plot'], axbox=ax['box'], pdf_path=pdf_path) as de:
+    with DataExtractor(fig=fig, objects=objects, ax0=ax['main'], ax1=ax['plot'], axbox=ax['box'], pdf_path=pdf_path,
+                       simplify=simplify, simplify_units=simplify_units, store=store, page=page, index=index, resample=resample) as de:
+        if backdrop is not None:
+            add_backdrop(ax['main'], *backdrop)
         plt.show()
         de.wait()
         
     return de
     
-def runall(pdf_path):
-    drw_path = pdf_path + '.drw'
-    if not os.path.exists(drw_path):
-        pdf2drawings(pdf_path, split_broken_path=True)
-    paths = load_pickle(drw_path)
-    
-    if len(paths) == 0:
-        raise EmptyPathError(f"Found nothing to extract from '{pdf_path}': is it a vector image?")
-    
-    ei_files = ['.mkr', '.typ']
-    if any(os.path.exists(pdf_path + ei_file) for ei_file in ei_files):
-        redo = pause_and_warn('Seems that you have already identified plot elements. Re-identifing will overwrite the information saved (files "{}") earlier'.format('" and "'.join([pdf_path + ei_file for ei_file in ei_files])),
-                              choose='do you want to redo this step? ',
-                              no_message='', warn=False)
-        if redo:        
-            ei = element_identifier(paths)
-            ei.save(pdf_path, yes=True)
-    else: # element_identifier not run
-        ei = element_identifier(paths)
-        ei.save(pdf_path)
-    
-    filtered_obj_path = pdf_path + '.sel.obj'
-    
-    if os.path.exists(filtered_obj_path):
-        do_selection = pause_and_warn('Seems that you have already selected part of the plot for extraction. Re-selecting will overwrite the information saved (files "{}") earlier'.format('" and "'.join([filtered_obj_path])),
-                              choose='do you want to redo this step? ',
-                              no_message='', warn=False)
-    else:
-        do_selection = True
-    
-    if do_selection:
-        types, known_markers = ElementIdentifier.load(pdf_path)
-        objects = group_paths(paths, types, mode='typestr', markers=known_markers, marker_getter='mean')
+def runall(pdf_path, clip=None, workers=None, dedup=True, merge_fill_stroke=False, simplify=None, simplify_units='page',
+           store=None, page=0, markers=None, stitch=None, backdrop=None, update=False, progress=None, resample=None,
+           native_svg=False):
+    # clip: (x0, y0, x1, y1) in page coordinates, only extract drawings in this region
+    # workers: number of processes for parsing paths (-1 for all CPU cores), see drawing.parse_paths
+    # dedup, merge_fill_stroke: remove paths drawn more than once, see drawing.remove_duplicate_paths
+    # simplify, simplify_units: tolerance for simplifying exported lines, see mplui.DataExtractor
+    # store: where the results are saved: None for files next to pdf_path, or the path of an SQLite database, see store.open_store
+    # page: page number (starting from 0)
+    # markers: path to a marker library (SQLite database, see markerlib.MarkerLibrary) used to identify elements; 
+    #     what is identified by the user is added to it
+    # stitch: join line segments whose ends coincide within this tolerance (in points) into one line, see stitch.stitch_lines
+    # backdrop: if given, the page is rendered at this DPI and shown below the elements in all steps, for context 
+    #     (e.g., text, and elements discarded or not selected); only the elements being worked on are drawn as vector artists
+    # update: if drawings have been extracted, extract them again (e.g., the figure has been regenerated), and carry the 
+    #     identified types and the selection over to elements that did not change or only moved (see revision.match_paths), 
+    #     so that only new elements are identified
+    # resample: number of x of a common grid that the lines of each axis are also exported on, see export.DataExporter
+    # native_svg: read SVG files directly instead of with fitz, see fileio.pdf2drawings
+    # progress: called with the progress of extracting drawings and grouping objects (e.g., progress.ProgressLine()), see progress.py
+    opened = isinstance(store, (str, os.PathLike)) # closed here if opened here
+    store = open_store(store)
+    library = None if markers is None else MarkerLibrary(markers)
+    pre = None
+    try:
+        old_paths = None # drawings extracted earlier, if updated
+        if not store.exists('drawings', pdf_path, page):
+            paths = pdf2drawings(pdf_path, out_path=False, page=page, split_broken_path=True, clip=clip, native_svg=native_svg,
+                                 progress=progress)
+            store.save_drawings(pdf_path, paths, page=page)
+        elif update:
+            old_paths = store.load_drawings(pdf_path, page=page)
+            paths = pdf2drawings(pdf_path, out_path=False, page=page, split_broken_path=True, clip=clip, native_svg=native_svg,
+                                 progress=progress)
+            old_idx, moved = match_paths(old_paths, paths)
+            print(f'{np.count_nonzero(old_idx >= 0) - np.count_nonzero(moved)} elements unchanged, {np.count_nonzero(moved)} moved, '
+                  f'{np.count_nonzero(old_idx < 0)} new, and {len(old_paths) - np.count_nonzero(old_idx >= 0)} removed since the drawings were extracted')
+            store.save_drawings(pdf_path, paths, page=page, yes=True)
+            if store.exists('identification', pdf_path, page):
+                types, known_markers = store.load_identification(pdf_path, page=page)
+                store.save_identification(pdf_path, carry_types(types, old_idx), known_markers, page=page, yes=True)
+        elif clip is not None:
+            redo = pause_and_warn(f'Drawings have already been extracted to {store.where("drawings", pdf_path, page)}, maybe with a different region. Re-extracting will change the elements, and the information saved in the following steps may no longer match',
+                                  choose='do you want to re-extract drawings in the given region? ',
+                                  no_message='', warn=False)
+            if redo:
+                paths = pdf2drawings(pdf_path, out_path=False, page=page, split_broken_path=True, clip=clip, native_svg=native_svg,
+                                     progress=progress)
+                store.save_drawings(pdf_path, paths, page=page, yes=True)
+        paths = store.load_drawings(pdf_path, page=page)
+    
+        if len(paths) == 0:
+            raise EmptyPathError(f"Found nothing to extract from '{pdf_path}': is it a vector image?")
+    
+        inverse = None
+        if dedup:
+            paths, inverse = remove_duplicate_paths(paths, merge_fill_stroke=merge_fill_stroke)
+            if len(paths) < len(inverse):
+                print(f'{len(inverse) - len(paths)} duplicate elements removed')
+        if old_paths is not None: # the paths the saved selection refers to
+            if dedup:
+                old_paths, _ = remove_duplicate_paths(old_paths, merge_fill_stroke=merge_fill_stroke)
+            old_idx, _ = match_paths(old_paths, paths)
+    
+        # parse paths (and hash their features) in the background while the user answers the prompts below
+        pre = Precomputer(paths, workers=workers, library=library)
+        if backdrop is not None:
+            pre.submit('backdrop', render_page, pdf_path, page=page, dpi=backdrop)
+        backdrop_image = lambda: None if backdrop is None else pre.get('backdrop')
+    
+        if old_paths is not None and store.exists('identification', pdf_path, page): # carried over: only identify new elements
+            types, known_markers = ElementIdentifier.load(pdf_path, store=store, page=page)
+            types = np.frombuffer(types.encode(), dtype='S1')
+            if inverse is not None:
+                types = types[np.unique(inverse, return_index=True)[1]]
+            redo = np.any(old_idx < 0)
+            if redo:
+                ei = element_identifier(paths, workers=workers, parsed=pre.get('parsed'), backdrop=backdrop_image(),
+                                        known=(types, known_markers), only=old_idx < 0)
+                ei.save(pdf_path, yes=True, inverse=inverse, store=store, page=page)
+        elif store.exists('identification', pdf_path, page):
+            redo = pause_and_warn('Seems that you have already identified plot elements. Re-identifing will overwrite the information saved ({}) earlier'.format(store.where('identification', pdf_path, page)),
+                                  choose='do you want to redo this step? ',
+                                  no_message='', warn=False)
+            if redo:        
+                ei = element_identifier(paths, workers=workers, library=library, parsed=pre.get('parsed'),
+                                        path_signatures=None if library is None else pre.get('signatures'), backdrop=backdrop_image())
+                ei.save(pdf_path, yes=True, inverse=inverse, store=store, page=page)
+        else: # element_identifier not run
+            redo = True
+            ei = element_identifier(paths, workers=workers, library=library, parsed=pre.get('parsed'),
+                                    path_signatures=None if library is None else pre.get('signatures'), backdrop=backdrop_image())
+            ei.save(pdf_path, inverse=inverse, store=store, page=page)
+        if library is not None and redo:
+            added = library.add(ei.rules, source=pdf_path)
+            print(f'{added} new rules added to the marker library "{library.path}"')
+    
+        types, known_markers = ElementIdentifier.load(pdf_path, store=store, page=page)
+        if inverse is not None: # types of the first one of duplicated paths
+            types = ''.join(types[i] for i in np.unique(inverse, return_index=True)[1])
+        # the selection saved is the indexes of the objects, which must be grouped from the same paths and identification
+        fingerprint = fingerprint_objects(paths, types, known_markers, marker_getter='mean', stitch=stitch)
+    
+        objects = selected = None
+        if old_paths is not None and store.exists('selection', pdf_path, page):
+            selection = store.load_selection(pdf_path, page=page)
+            do_selection = True
+            if 'fingerprint' in selection: # not saved by earlier versions (the objects themselves), so it can be carried over
+                objects = group_paths(paths, types, mode='typestr', markers=known_markers, marker_getter='mean', parsed=pre.get('parsed'), stitch=stitch,
+                                  progress=progress)
+                selected, new = carry_selection(selection, objects, old_idx)
+                nnew = sum(np.count_nonzero(mask) for mask in new.values())
+                if nnew:
+                    do_selection = pause_and_warn(f'{nnew} objects are new since the selection was made, and are not selected',
+                                                  choose='do you want to review the selection? ', no_message='', warn=False)
+                else:
+                    do_selection = False
+                if not do_selection:
+                    filtered_objects = get_filtered_objects(objects, selected)
+                    store.save_selection(pdf_path, selection_record(objects, selected, fingerprint, marker_getter='mean'), page=page, yes=True)
+        elif store.exists('selection', pdf_path, page):
+            do_selection = pause_and_warn('Seems that you have already selected part of the plot for extraction. Re-selecting will overwrite the information saved ({}) earlier'.format(store.where('selection', pdf_path, page)),
+                                  choose='do you want to redo this step? ',
+                                  no_message='', warn=False)
+        else:
+            do_selection = True
+    
+        index = None
+        if not do_selection and selected is None:
+            selection = store.load_selection(pdf_path, page=page)
+            if 'fingerprint' not in selection: # saved by earlier versions: the objects themselves
+                filtered_objects = selection
+            elif selection['fingerprint'] == fingerprint:
+                parsed = pre.get('parsed') if pre.future('parsed').done() else None
+                filtered_objects = rebuild_objects(paths, selection, workers=workers, parsed=parsed)
+            else:
+                do_selection = pause_and_warn('The drawings or identified elements have changed since the selection saved ({}) was made'.format(store.where('selection', pdf_path, page)),
+                                              choose='do you want to redo the selection? ', warn=False)
+    
+        if do_selection:
+            if objects is None:
+                objects = group_paths(paths, types, mode='typestr', markers=known_markers, marker_getter='mean', parsed=pre.get('parsed'), stitch=stitch,
+                                  progress=progress)
         
-        ros = data_filter(objects)
+            # the index is built while the user looks at the objects, and is also used by the data extractor
+            ros = data_filter(objects, index=pre.index(objects), backdrop=backdrop_image(), selected=selected)
         
-        # selection = ros.selected
-        filtered_objects = ros.get_filtered_objects()
+            # selection = ros.selected
+            filtered_objects = ros.get_filtered_objects()
+            index = subset_vertex_index(pre.get('index'), ros.selected, types=['l', 's'])
         
-        save_pickle(filtered_obj_path, filtered_objects)
-    else:
-        filtered_objects = load_pickle(filtered_obj_path)
+            store.save_selection(pdf_path, selection_record(objects, ros.selected, fingerprint, marker_getter='mean'), page=page, yes=True)
+        image = backdrop_image() # before closing pre, which cancels jobs not started
+        pre.close()
     
-    de = data_extractor(filtered_objects, pdf_path=pdf_path)
+        de = data_extractor(filtered_objects, pdf_path=pdf_path, simplify=simplify, simplify_units=simplify_units,
+                            store=store, page=page, index=index, backdrop=image, resample=resample)
+    finally:
+        if pre is not None: # stop background parsing if a step failed (it is already closed otherwise)
+            pre.close()
+        if library is not None:
+            library.close()
+        if opened:
+            store.close()
     
 def main(argv=None):
     parser = ArgumentParser(
@@ -122,10 +292,42 @@ def main(argv=None):
         description='extracting data points from vector plots (pdf, etc.): a general UI',
         epilog='This is part of the Python package vector-plot-extractor, (C) Yu-Chen Wang, distributed under GPL v3.')
     parser.add_argument('pdfpath', help='path to your pdf file')
+    parser.add_argument('--page', type=int, default=0, help='page number, starting from 0 (default: 0)')
+    parser.add_argument('--store', default=None, metavar='DATABASE',
+                        help='save results of all steps to this SQLite database instead of files next to the pdf file')
+    parser.add_argument('--markers', default=None, metavar='LIBRARY',
+                        help='identify elements with this marker library (SQLite database, created if needed), and add what you identify to it')
+    parser.add_argument('--clip', nargs=4, type=float, metavar=('X0', 'Y0', 'X1', 'Y1'),
+                        help='only extract elements overlapping with this rectangle (page coordinates in points, origin at the top-left corner)')
+    parser.add_argument('--native-svg', action='store_true',
+                        help='read SVG files directly instead of rendering them with PyMuPDF (faster for large files)')
+    
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of processes used to parse elements of large pages (-1 for all CPU cores)')
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help='do not remove elements drawn more than once with the same shape and style')
+    parser.add_argument('--merge-fill-stroke', action='store_true',
+                        help='merge a filled element and an outlined element with the same shape into one element')
+    parser.add_argument('--simplify', type=float, default=None, metavar='TOL',
+                        help='drop line points within TOL of the simplified line when exporting (Ramer-Douglas-Peucker)')
+    parser.add_argument('--simplify-units', choices=['page', 'data'], default='page',
+                        help='units of TOL: points of the page, or data units (decades for log axes)')
+    parser.add_argument('--resample', type=int, default=None, metavar='N',
+                        help='also export the lines of each axis on a common grid of N x (evenly spaced in the axis scale)')
+    parser.add_argument('--stitch', type=positive_float, default=None, metavar='TOL',
+                        help='join line segments of the same style whose ends coincide within TOL (points of the page) into one line')
+    parser.add_argument('--backdrop', type=float, default=None, metavar='DPI',
+                        help='show the page rendered at DPI below the elements in all steps, for context (e.g., text and discarded elements)')
+    parser.add_argument('--update', action='store_true',
+                        help='extract drawings again (e.g., after the figure is regenerated), keeping what was identified and selected for elements that did not change or only moved')
     
     args = parser.parse_args(argv)
     
-    runall(pdf_path=args.pdfpath)
+    runall(pdf_path=args.pdfpath, clip=args.clip, workers=args.workers, 
+           dedup=not args.keep_duplicates, merge_fill_stroke=args.merge_fill_stroke,
+           simplify=args.simplify, simplify_units=args.simplify_units,
+           store=args.store, page=args.page, markers=args.markers, stitch=args.stitch, backdrop=args.backdrop, update=args.update, progress=ProgressLine(),
+           resample=args.resample, native_svg=args.native_svg)
     
 if __name__ == '__main__':
     main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+level of detail: draw dense lines and scatters at the resolution of the current view
+"""
+
+import numpy as np
+from matplotlib.collections import Collection
+
+def decimate_line(px, py, x0, x1):
+    '''
+    indexes of points of a polyline needed to draw it at pixel resolution
+
+    Consecutive points in the same pixel column are reduced to the first, the last,
+    the lowest and the highest of them, so the drawn line does not change.
+    Points left of ``x0`` or right of ``x1`` are put in one column on each side.
+
+    Parameters
+    ----------
+    px, py : numpy.ndarray
+        Positions of the points in pixels.
+    x0, x1 : float
+        The horizontal range of the view, in pixels.
+
+    Returns
+    -------
+    idx : numpy.ndarray
+        Sorted indexes of the points kept.
+    '''
+    n = px.size
+    if n <= 4:
+        return np.arange(n)
+    col = np.floor(np.clip(px, x0 - 1, x1 + 1))
+    starts = np.flatnonzero(np.r_[True, col[1:] != col[:-1]]) # runs of points in the same column
+    sizes = np.diff(np.r_[starts, n])
+    ends = starts + sizes - 1
+    run = np.repeat(np.arange(starts.size), sizes)
+    idx = np.zeros(n, dtype=bool)
+    idx[starts] = idx[ends] = True # first, last
+    for extreme in [np.minimum, np.maximum]: # lowest, highest (the first one if there are ties)
+        found = np.flatnonzero(py == np.repeat(extreme.reduceat(py, starts), sizes))
+        idx[found[np.r_[True, run[found[1:]] != run[found[:-1]]]]] = True
+    return np.flatnonzero(idx)
+
+def thin_scatter(px, py, bbox, cell=2, margin=20):
+    '''
+    indexes of markers to draw: one marker per pixel cell of size `cell`,
+    and no markers farther than `margin` pixels from the view `bbox` ((x0, y0, x1, y1) in pixels)
+    '''
+    x0, y0, x1, y1 = bbox
+    inview = np.flatnonzero((px >= x0 - margin) & (px <= x1 + margin) & (py >= y0 - margin) & (py <= y1 + margin))
+    cells = np.floor(px[inview] / cell) + 1j * np.floor(py[inview] / cell)
+    _, first = np.unique(cells, return_index=True)
+    return inview[np.sort(first)]
+
+class LevelOfDetail():
+    '''
+    Draw dense lines and scatters of an Axes at the resolution of the current view.
+
+    Registered lines (``Line2D``) are decimated to pixel columns (see ``decimate_line``),
+    and registered scatters (collections of markers) are thinned to one marker per 2x2 pixels
+    (see ``thin_scatter``). This is done again when the view limits change, so full detail
+    is drawn when zooming in. Artists with fewer points than the thresholds are not touched.
+
+    Parameters
+    ----------
+    ax : Axes
+        The Matplotlib Axes.
+    line_threshold : int, optional
+        Lines with more points are decimated. The default is 2000.
+    scatter_threshold : int, optional
+        Scatters with more markers are thinned. The default is 2000.
+    '''
+
+    def __init__(self, ax, line_threshold=2000, scatter_threshold=2000):
+        self.ax = ax
+        self.line_threshold = line_threshold
+        self.scatter_threshold = scatter_threshold
+        self.lines = [] # (artist, full xy)
+        self.scatters = [] # (artist, positions, full geometry, full properties)
+        self.cids = []
+        self._updating = False
+        self.connect()
+
+    def connect(self):
+        # update when the view limits change
+        self.cids = [self.ax.callbacks.connect(event, self.update) for event in ['xlim_changed', 'ylim_changed']]
+
+    def add_line(self, line):
+        xy = line.get_xydata()
+        if len(xy) > self.line_threshold:
+            self.lines.append((line, np.array(xy)))
+
+    def add_scatter(self, collection, positions=None):
+        # positions: (N, 2) positions of the markers of a collection of N patches or lines
+        # (e.g., coords of scatter objects, see drawing.group_paths); not needed for ax.scatter()
+        offsets = collection.get_offsets()
+        if positions is None:
+            positions = offsets
+            geometry = 'offsets', np.array(offsets)
+        else:
+            geometry = 'paths', list(collection.get_paths())
+        positions = np.asarray(positions, dtype=float)
+        n = len(positions)
+        if n <= self.scatter_threshold:
+            return
+        props = {}
+        for name in ['facecolor', 'edgecolor', 'linewidth', 'sizes']:
+            getter = getattr(collection, f'get_{name}', None)
+            if getter is not None:
+                values = np.asarray(getter())
+                if values.ndim and len(values) == n:
+                    props[name] = values
+        self.scatters.append((collection, positions, geometry, props))
+
+    def add_objects(self, objects):
+        # register artists of grouped objects, see drawing.plot_objects
+        for typ, typ_objs in objects.items():
+            for obj in typ_objs:
+                artist = obj['artist']
+                if isinstance(artist, Collection):
+                    if typ == 's':
+                        self.add_scatter(artist, np.transpose(obj['coords']))
+                elif hasattr(artist, 'get_xydata'):
+                    self.add_line(artist)
+
+    def clear(self):
+        # forget all artists; call it after the Axes is cleared, which also removes the callbacks
+        self.lines.clear()
+        self.scatters.clear()
+        if self.cids:
+            self.connect()
+
+    def update(self, ax=None):
+        if self._updating or not (self.lines or self.scatters):
+            return
+        self._updating = True
+        try:
+            self.ax.get_xlim() # autoscale (if pending) with the full data first
+            trans = self.ax.transData
+            x0, y0, x1, y1 = self.ax.bbox.extents
+            for line, xy in self.lines:
+                pxy = trans.transform(xy)
+                idx = decimate_line(pxy[:, 0], pxy[:, 1], x0, x1)
+                line.set_data(xy[idx, 0], xy[idx, 1])
+            for collection, positions, (kind, geometry), props in self.scatters:
+                pxy = trans.transform(positions)
+                idx = thin_scatter(pxy[:, 0], pxy[:, 1], (x0, y0, x1, y1))
+                if kind == 'offsets':
+                    collection.set_offsets(geometry[idx])
+                else:
+                    Collection.set_paths(collection, [geometry[i] for i in idx])
+                for name, values in props.items():
+                    getattr(collection, f'set_{name}')(values[idx])
+        finally:
+            self._updating = False
+
+    def restore(self):
+        # draw everything in full detail and stop updating
+        for cid in self.cids:
+            self.ax.callbacks.disconnect(cid)
+        self.cids = []
+        for line, xy in self.lines:
+            line.set_data(xy[:, 0], xy[:, 1])
+        for collection, positions, (kind, geometry), props in self.scatters:
+            if kind == 'offsets':
+                collection.set_offsets(geometry)
+            else:
+                Collection.set_paths(collection, geometry)
+            for name, values in props.items():
+                getattr(collection, f'set_{name}')(values)
+        self.lines.clear()
+        self.scatters.clear()
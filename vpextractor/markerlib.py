@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+a library of identified elements shared by many figures
+
+Each rule is what the user told ``mplui.ElementIdentifier``: an element type
+([s]catter, [l]ine, [d]iscard, [o]thers), how similar elements are matched
+(``match_by``: [s]hape, c[o]lor, co[l]or+shape) and the feature of the element
+clicked. Rules are saved in an SQLite database with a hashed signature of
+the feature, so that elements of a new figure are classified by looking up
+their signatures instead of comparing them with every rule.
+"""
+
+import json
+import hashlib
+import sqlite3
+import numpy as np
+from .filter import select_paths, ambiguous_scatters
+
+SHAPE_CELL = 0.1 # size of the cells (in points) of the width and height of shapes in signatures
+
+def _json_default(x):
+    return x.tolist() if isinstance(x, np.ndarray) else x
+
+def _color_key(color):
+    color = np.asarray(color, dtype=object)
+    if color.size == 0 or (color.ndim == 0 and color.item() is None):
+        return None
+    return tuple(float(c) for c in np.ravel(color))
+
+def _shape_cells(rel_pos):
+    # number of points, and the cell of the width and height (see filter.eq for how shapes are compared)
+    rel_pos = np.asarray(rel_pos, dtype=float)
+    if rel_pos.size == 0:
+        return rel_pos.shape, 0, 0
+    width, height = np.ptp(rel_pos, axis=1)
+    return rel_pos.shape, int(width // SHAPE_CELL), int(height // SHAPE_CELL)
+
+def signatures(feature, match_by, neighbors=False):
+    '''
+    hashed signatures of a path feature for a match mode
+
+    Elements matched by a rule (see ``filter.select_paths``) have the same signature as the
+    rule, except that the width or height of their shapes may be in a neighboring cell.
+    So with ``neighbors=True``, the signatures of the neighboring cells are also returned.
+    '''
+    key = []
+    if match_by in 'ol':
+        key.append(('color', _color_key(feature['color']), _color_key(feature['fill'])))
+    if match_by in 'sl':
+        shape, w, h = _shape_cells(feature['rel_pos'])
+        shifts = [-1, 0, 1] if neighbors else [0]
+        cells = [(shape, w + dw, h + dh) for dw in shifts for dh in shifts]
+    else:
+        cells = [None]
+    return [hashlib.sha1(repr((match_by, *key, cell)).encode()).hexdigest()[:16] for cell in cells]
+
+def feature_signatures(path_features):
+    # signatures (with neighbors) of path features for all match modes, as used by MarkerLibrary.match
+    return [{match_by: signatures(path_feature, match_by, neighbors=True) for match_by in 'sol'}
+            for path_feature in path_features]
+
+class MarkerLibrary():
+    '''
+    rules for identifying elements, accumulated from many figures
+
+    Parameters
+    ----------
+    path : str
+        Path to the SQLite database (may be the same database as ``store.SQLiteStore``).
+        Created if it does not exist.
+    '''
+    schema = '''
+    CREATE TABLE IF NOT EXISTS marker_rules (
+        id INTEGER PRIMARY KEY,
+        type TEXT NOT NULL,
+        match_by TEXT NOT NULL,
+        signature TEXT NOT NULL,
+        feature TEXT NOT NULL,
+        source TEXT,
+        count INTEGER NOT NULL DEFAULT 1);
+    CREATE INDEX IF NOT EXISTS marker_rules_signature ON marker_rules (match_by, signature);
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.executescript(self.schema)
+        self._index = None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM marker_rules').fetchone()[0]
+
+    def rules(self):
+        # all rules, in the order they were added
+        return [{'id': id_, 'type': typ, 'match_by': match_by, 'feature': json.loads(feature), 'source': source, 'count': count}
+                for id_, typ, match_by, feature, source, count in self.conn.execute(
+                    'SELECT id, type, match_by, feature, source, count FROM marker_rules ORDER BY id')]
+
+    def find(self, rule):
+        # id of an existing rule with the same type, match mode and a matching feature, or None
+        signature, = signatures(rule['feature'], rule['match_by'])
+        for id_, feature in self.conn.execute(
+                'SELECT id, feature FROM marker_rules WHERE type = ? AND match_by = ? AND signature = ? ORDER BY id',
+                (rule['type'], rule['match_by'], signature)):
+            if select_paths(json.loads(feature), [rule['feature']], modes=rule['match_by']):
+                return id_
+        return None
+
+    def add(self, rules, source=None):
+        '''
+        add rules (dicts with keys "type", "match_by" and "feature", see ``mplui.ElementIdentifier.rules``).
+        A rule already in the library is counted instead of added again.
+        Returns the number of new rules.
+        '''
+        added = 0
+        with self.conn:
+            for rule in rules:
+                id_ = self.find(rule)
+                if id_ is None:
+                    signature, = signatures(rule['feature'], rule['match_by'])
+                    self.conn.execute(
+                        'INSERT INTO marker_rules (type, match_by, signature, feature, source) VALUES (?, ?, ?, ?, ?)',
+                        (rule['type'], rule['match_by'], signature, json.dumps(rule['feature'], default=_json_default), source))
+                    added += 1
+                else:
+                    self.conn.execute('UPDATE marker_rules SET count = count + 1 WHERE id = ?', (id_,))
+        self._index = None
+        return added
+
+    def index(self):
+        # signature -> rules with that signature, built once
+        if self._index is None:
+            self._index = {}
+            for rule in self.rules():
+                signature, = signatures(rule['feature'], rule['match_by'])
+                self._index.setdefault((rule['match_by'], signature), []).append(rule)
+        return self._index
+
+    def match(self, path_feature, path_signatures=None):
+        # the earliest rule matching a path feature, or None
+        # path_signatures: signatures of the feature, if already computed (see feature_signatures)
+        index = self.index()
+        candidates = []
+        for match_by in 'sol':
+            for signature in (signatures(path_feature, match_by, neighbors=True) if path_signatures is None else path_signatures[match_by]):
+                candidates += index.get((match_by, signature), [])
+        for rule in sorted(candidates, key=lambda rule: rule['id']):
+            if select_paths(rule['feature'], [path_feature], modes=rule['match_by']):
+                return rule
+        return None
+
+    def classify(self, path_features, path_signatures=None):
+        '''
+        classify elements with the rules
+
+        Parameters
+        ----------
+        path_features : list
+            Features of the paths (see ``drawing.parse_path``).
+        path_signatures : list, optional
+            Signatures of the features, if already computed (see ``feature_signatures``).
+
+        Returns
+        -------
+        types : numpy.ndarray
+            Types of the paths (dtype 'S1'), 'u' for those not matched by any rule.
+        known_markers : list
+            Markers (in the format of ``mplui.ElementIdentifier.known_markers``) of
+            the scatter rules used, needed to group scatters (see ``drawing.group_paths``).
+        '''
+        types = np.full(len(path_features), 'u', dtype='S1')
+        rule_ids = np.full(len(path_features), -1)
+        markers = {}
+        for i, path_feature in enumerate(path_features):
+            rule = self.match(path_feature, None if path_signatures is None else path_signatures[i])
+            if rule is not None:
+                types[i] = rule['type']
+                rule_ids[i] = rule['id']
+                if rule['type'] == 's':
+                    markers[rule['id']] = {'match_by': rule['match_by'], 'feature': rule['feature']}
+
+        # a scatter must match exactly one marker to be grouped: leave ambiguous ones to the user
+        known_markers = list(markers.values())
+        types[ambiguous_scatters(types, path_features, known_markers)] = 'u'
+        return types, known_markers
@@ -6,19 +6,17 @@ Created on Thu Jan 18 19:28:30 2024
 """
 
 import numpy as np
-from .filter import select_paths, rect_filter_objects, get_filtered_objects
+from .filter import select_paths, ambiguous_scatters, rect_filter_objects, get_filtered_objects, rect_select_indexed, polygon_select_indexed, build_vertex_index
 from copy import copy, deepcopy
-from .drawing import add, plot_objects, get_color, Line2D
+from .drawing import add, plot_objects, Line2D, ObjectView
 import matplotlib.pyplot as plt
-from .utils import pause_and_warn, save_pickle, annotate, dedup
-import os
-import json
+from .utils import pause_and_warn, annotate
+from .export import DataExporter, ConsistencyError
+from .lod import LevelOfDetail
+from .store import open_store
 from matplotlib.widgets import TextBox
 from itertools import chain
-from . import __version__
-
-class ConsistencyError(Exception):
-    pass
+from concurrent.futures import Future
 
 class BaseEventHandler():
     def __init__(self, fig=None, **kwargs):
@@ -121,22 +119,29 @@ class BaseEventHandler():
             
 
 class RectSelector(BaseEventHandler):
-    def init(self, finish=True):
+    def init(self, finish=True, lasso=False):
         # finish: if set to True, will be considered finished whenever a region is selected
+        # lasso: if set to True, select a free-hand polygon instead of a rectangle; 
+        #     (x0, x1, y0, y1) is then its bounding box
         self.rects = {}
         for ax in self.fig.axes:
             rect, = ax.plot([], [], linestyle='--', color='r')
             self.rects[ax] = rect
         self.finish = finish
+        self.lasso = lasso
+        self.lasso_xy = []
     
     def onpress(self, event):
         self.finished = False
         self.ax = event.inaxes
         self.x0, self.y0 = event.xdata, event.ydata
+        self.lasso_xy = [(event.xdata, event.ydata)]
     
     def onmove_down(self, event):
         if event.inaxes == self.ax:
             self.x1, self.y1 = event.xdata, event.ydata
+            if self.lasso:
+                self.lasso_xy.append((event.xdata, event.ydata))
             
             x, y  = self.get_xydata()
             self.rects[self.ax].set_data(x, y)
@@ -144,15 +149,23 @@ class RectSelector(BaseEventHandler):
             self.fig.canvas.draw()
             
     def onrelease(self, event):
+        if self.lasso:
+            (self.x0, self.y0), (self.x1, self.y1) = np.min(self.lasso_xy, axis=0), np.max(self.lasso_xy, axis=0)
         self.x0, self.x1 = np.sort((self.x0, self.x1))
         self.y0, self.y1 = np.sort((self.y0, self.y1))
-        self.rects[self.ax].set_marker('s')
+        self.rects[self.ax].set_marker('' if self.lasso else 's')
         self.fig.canvas.draw()
         
         if self.finish: 
             self.finished = True
         
     def get_xydata(self, closed=True):
+        if self.lasso:
+            x, y = (list(c) for c in zip(*self.lasso_xy))
+            if closed:
+                x.append(x[0])
+                y.append(y[0])
+            return x, y
         x0, x1 = np.sort((self.x0, self.x1))
         y0, y1 = np.sort((self.y0, self.y1))
         if closed:
@@ -179,18 +192,46 @@ class ObjectChecker(BaseEventHandler):
         print(f'path_feature = {self.path_feature}')
 
 class ElementIdentifier(BaseEventHandler):
-    def init(self, ax, artists, artists_in_plot, path_features):
+    def init(self, ax, artists, artists_in_plot, path_features, types=None, known_markers=None, only=None):
+        # types, known_markers: elements already identified (e.g., by markerlib.MarkerLibrary.classify), which are not shown
+        # only: boolean mask of the elements to identify (e.g., new elements), others are not shown even if not identified
         self.ax = ax
         self.artists = artists
         self.artists_in_plot = artists_in_plot
         self.path_features = path_features
+        self.all_path_features = path_features # of all elements, including those removed from the plot
         self.indexes = np.arange(len(self.path_features), dtype=int)
-        self.known_markers = []
+        self.known_markers = [] if known_markers is None else list(known_markers)
+        self.rules = [] # everything identified by the user: type, match_by and feature (see markerlib)
         self.matches = []
         self.types = np.full((len(artists),), fill_value='u', dtype='S1') # [S]catter, [L]ine, [D]iscard. u means "not marked"
+        if types is not None:
+            self.types[:] = types
+        if types is not None or only is not None:
+            self.remove_elements(np.flatnonzero((self.types != b'u') | (False if only is None else ~np.asarray(only, dtype=bool))))
         self.state = 0
         self.fig.suptitle('click element to identify')
     
+    def remove_elements(self, idxs):
+        # remove elements idxs (indexes of the elements not yet identified) from the plot
+        idxs = set(idxs)
+        new_artists = []
+        new_path_features = []
+        new_artists_in_plot = []
+        new_indexes = []
+        for i, artist in enumerate(self.artists):
+            if i in idxs:
+                self.artists_in_plot[i].remove()
+            else:
+                new_artists.append(artist)
+                new_artists_in_plot.append(self.artists_in_plot[i])
+                new_path_features.append(self.path_features[i])
+                new_indexes.append(self.indexes[i])
+        self.artists = new_artists
+        self.artists_in_plot = new_artists_in_plot
+        self.path_features = new_path_features
+        self.indexes = np.array(new_indexes, dtype=int)
+    
     def onpick(self, event):
         artist = event.artist
         # print(artist)
@@ -266,6 +307,10 @@ class ElementIdentifier(BaseEventHandler):
                     
             elif self.state == 3:
                 self.types[self.indexes[self.matched_idxs]] = self.type
+                self.rules.append({
+                    'type': self.type,
+                    'match_by': self.match_mode,
+                    'feature': self.path_feature})
                     
                 if self.type == 's':
                     self.known_markers.append({
@@ -281,22 +326,7 @@ class ElementIdentifier(BaseEventHandler):
                     raise ValueError
                 
                 # remove matched artists
-                new_artists = []
-                new_path_features = []
-                new_artists_in_plot = []
-                new_indexes = []
-                for i, artist in enumerate(self.artists):
-                    if i in self.matched_idxs:
-                        self.artists_in_plot[i].remove()
-                    else:
-                        new_artists.append(artist)
-                        new_artists_in_plot.append(self.artists_in_plot[i])
-                        new_path_features.append(self.path_features[i])
-                        new_indexes.append(self.indexes[i])
-                self.artists = new_artists
-                self.artists_in_plot = new_artists_in_plot
-                self.path_features = new_path_features
-                self.indexes = np.array(new_indexes)
+                self.remove_elements(self.matched_idxs)
                 
                 self.state = 0
                 self.fig.suptitle('click element to identify, or [F]inish')
@@ -305,104 +335,122 @@ class ElementIdentifier(BaseEventHandler):
             
         self.fig.canvas.draw()
             
-    def save(self, basepath, yes=False):
+    def save(self, basepath, yes=False, inverse=None, store=None, page=0):
         # save information to file
-        type_path = basepath + '.typ'
-        if not yes and os.path.exists(type_path):
-            pause_and_warn('File "{}" already exists!'.format(type_path), choose='overwrite existing files?',
-                           default='n', yes_message='overwritten', no_message='raise')
-        with open(type_path, 'wb') as f:
-            f.write(self.types.tobytes())
-        
-        marker_path = basepath + '.mkr'
-        if not yes and os.path.exists(marker_path):
-            pause_and_warn('File "{}" already exists!'.format(type_path), choose='overwrite existing files?',
-                           default='n', yes_message='overwritten', no_message='raise')
-        
-        with open(marker_path, 'w') as f:
-            json.dump(self.known_markers, f, #ensure_ascii=True, indent=2,
-                      default=lambda x: x.tolist() if isinstance(x, np.ndarray) else x,
-                      )
+        # inverse: if the identified paths are deduplicated, see drawing.remove_duplicate_paths; 
+        #     types are saved for the original paths, so that the indexes are those of the .drw file
+        # store, page: where to save, see store.open_store
+        # scatters matching more than one marker (e.g., identified by the library, and also matching a marker identified later)
+        # cannot be grouped, so they are left unidentified
+        ambiguous = ambiguous_scatters(self.types, self.all_path_features, self.known_markers)
+        if ambiguous:
+            print(f'WARNING: {len(ambiguous)} elements identified as scatter match more than one marker, and are left unidentified')
+            self.types[ambiguous] = 'u'
+        types = self.types if inverse is None else self.types[inverse]
+        open_store(store).save_identification(basepath, types, self.known_markers, page=page, yes=yes)
     
     @staticmethod
-    def load(basepath):
-        type_path = basepath + '.typ'
-        # with open(type_path, 'rb') as f:
-        #     types = np.frombuffer(f.read(), dtype='S1')
-        with open(type_path) as f:
-            types = f.read()
-        
-        marker_path = basepath + '.mkr'
-        with open(marker_path) as f:
-            known_markers = json.load(f)
-            
-        return types, known_markers
+    def load(basepath, store=None, page=0):
+        return open_store(store).load_identification(basepath, page=page)
     
 class RectObjectSelector(RectSelector):
-    def init(self, objects, ax=None, mode='touch'):
-        # modes: 
-        #     'touch': if any part of the group of object in this region (in other words, if the rectangle "touches" the object), select
+    modes = { # mode: description
+        'touch': 'touching', # if any part of the group of object in this region (in other words, if the region "touches" the object), select
+        'contain': 'inside', # if all of the object is in this region, select
+        'centroid': 'with the centroid inside', # if the mean of the vertices of the object is in this region, select
+        }
+    
+    def init(self, objects, ax=None, mode='touch', index=None, lasso=False, selected=None):
+        # mode: see `modes`, pressing "m" changes it
+        # selected: boolean masks of the objects of each type selected at first; all objects if None
+        # lasso: select a free-hand polygon instead of a rectangle, pressing "l" changes it
+        # index: vertex index of all objects (see filter.build_vertex_index), or a Future of it (see precompute.Precomputer);
+        #     if None, it is built when the first region is selected
+        if mode not in self.modes:
+            raise ValueError(f"unknown mode '{mode}'")
         
-        super().init()
-        self.objects = objects
+        super().init(lasso=lasso)
         if ax is None:
             ax = self.fig.ax
         self.ax = ax
-        self.objects = deepcopy(objects)
-        self.orig_objects = objects
-        self.selected = {}
-        for typ, typ_objs in objects.items():
-            self.selected[typ] = np.full(len(typ_objs), True, dtype=bool)
+        # the objects are shared, not copied: the selection is a boolean mask for each type, 
+        # which also tells what is shown (see drawing.ObjectView)
+        self.objects = objects
+        self.selected = {typ: np.full(len(typ_objs), True, dtype=bool) for typ, typ_objs in objects.items()}
         
         self.mode = mode
+        self.index = index
         
-        plot_objects((self.objects))
+        self.view = ObjectView(self.objects, self.ax)
+        if selected is not None:
+            self.set_selected({typ: np.asarray(selected[typ], dtype=bool) for typ in self.selected})
         
-        self.ax.set_title('change [M]ode, [R]estart, or select rectangle')
+        self.set_title()
+    
+    def set_title(self):
+        self.ax.set_title('select objects {} the {}\nchange [M]ode, [L]asso/rectangle, [R]estart, or select region'.format(
+            self.modes[self.mode], 'lasso' if self.lasso else 'rectangle'))
         
     def onrelease(self, event):
         super().onrelease(event)
         
-        selected = rect_filter_objects(self.objects, self.x0, self.x1, self.y0, self.y1, mode=self.mode)
+        if isinstance(self.index, Future): # wait for it if it is still being built
+            self.index = self.index.result()
+        elif self.index is None:
+            self.index = build_vertex_index(self.objects)
+        if self.lasso:
+            selected = polygon_select_indexed(self.index, self.lasso_xy, mode=self.mode)
+        else:
+            selected = rect_select_indexed(self.index, self.x0, self.x1, self.y0, self.y1, mode=self.mode)
         self.last_selected = selected
         # print(selected)
         
-        for typ, typ_objs in self.objects.items():
-            for idx in np.where(self.selected[typ] & ~selected[typ])[0]: # make them fade
-                # print(np.where(self.selected[typ] & ~selected[typ]))
-                # print(idx)
-                # assert typ_objs is self.objects[typ]
-                # print(typ_objs[idx]['artist'])
-                typ_objs[idx]['artist'].set_visible(False)
-                self.selected[typ][idx] = False
-        
+        self.set_selected({typ: self.selected[typ] & selected[typ] for typ in self.selected})
         self.fig.canvas.draw()
+    
+    def set_selected(self, selected):
+        # change the selection masks, and show only the objects selected
+        self.selected = selected
+        self.view.set_visible(selected)
         
     def onkeyrelease(self, event):
         if event.key == 'm':
-            self.ax.set_title('sorry, not supported yet')
-            plt.pause(1)
-            self.ax.set_title('change [M]ode, [R]estart, or select rectangle')
+            modes = list(self.modes)
+            self.mode = modes[(modes.index(self.mode) + 1) % len(modes)]
+            self.set_title()
+        elif event.key == 'l':
+            self.lasso = not self.lasso
+            self.set_title()
         elif event.key == 'r':
-            for typ, typ_objs in self.objects.items():
-                self.selected[typ] = np.full(len(typ_objs), True, dtype=bool)
-                for typ_obj in typ_objs:
-                    typ_obj['artist'].set_visible(True)
+            self.set_selected({typ: np.full(mask.size, True, dtype=bool) for typ, mask in self.selected.items()})
         self.fig.canvas.draw()
             
     def get_filtered_objects(self):
         # print(self.selected)
-        return get_filtered_objects(self.orig_objects, self.selected)
+        return get_filtered_objects(self.objects, self.selected)
     
     
-class DataExtractor(BaseEventHandler):
-    def init(self, objects, ax0, ax1, axbox, pdf_path=None):
-        self.exportpath = pdf_path + '.out'
-        if os.path.exists(self.exportpath):
-            pause_and_warn('File "{}" already exists: this file contains data you have exported.'.format(self.exportpath), choose='overwrite existing file?',
+class DataExtractor(BaseEventHandler, DataExporter):
+    def init(self, objects, ax0, ax1, axbox, pdf_path=None, simplify=None, simplify_units='page', lod=True, store=None, page=0, index=None,
+             resample=None):
+        # store, page: where axes and exported data are saved, see store.open_store
+        # lod: if True, draw dense lines and scatters at the resolution of the view, see lod.LevelOfDetail
+        # simplify: tolerance for simplifying exported lines, see simplify.rdp; not simplified if None
+        # simplify_units: 'page' (points of the page) or 'data' (data units, or decades for log axes)
+        # index: vertex index of the lines and scatters, if already built (see filter.build_vertex_index)
+        # resample: number of x of the common grid that lines of each axis are also exported on, see export.DataExporter
+        self.init_export(objects, simplify=simplify, simplify_units=simplify_units, index=index, resample=resample)
+        
+        if pdf_path is None:
+            raise NotImplementedError('please input pdf_path')
+        self.pdf_path = pdf_path
+        self.page = page
+        self.store = open_store(store)
+        self.exportpath = self.store.location('export', pdf_path, page)
+        if self.store.exists('export', pdf_path, page):
+            pause_and_warn('"{}" already exists: this contains data you have exported.'.format(self.exportpath), choose='overwrite existing file?',
                            default='n', yes_message='', no_message='raise', warn=False)
         
-        self.objects = objects
         self.ax0 = ax0
         self.ax1 = ax1
         self.axbox = axbox
@@ -418,27 +466,27 @@ class DataExtractor(BaseEventHandler):
         self.xscale = None
         self.yscale = None
         
-        self.export_data = {
-            'meta': {
-                'vpextractor_version': __version__,
-                },
-            }
-        
         self.axes = {} # data axes information, not real axes for plot
         self._ca = None # currect data axis number 
         self._next_axis = None # the next axis to be changed to
+        self._axis_input = '' # digits typed so far when choosing an axis
         
         self.select_mode = 'touch'
         
-        if pdf_path is not None:
-            self.savepath = pdf_path + '.axes'
-            # if os.path.exists(self.savepath):
-            #     pause_and_warn(f"'{self.savepath}' already exists!", choose='overwrite?')
-            self.axes.update(self.load())
-        else:
-            raise NotImplementedError('please input pdf_path')
+        self.savepath = self.store.location('axes', pdf_path, page)
+        self.axes.update(self.load())
         
         plot_objects(self.objects, ax=self.ax0)
+        self.lod0 = self.lod1 = None
+        if lod:
+            # LOD thins dense scatters in place, including the colors and widths of each marker, 
+            # so the styles to export (see export.DataExporter.get_info) are read from the artists first
+            for i in range(len(self.objects['s'])):
+                self.get_info('s', i)
+            self.lod0 = LevelOfDetail(self.ax0)
+            self.lod0.add_objects(self.objects)
+            self.lod0.update()
+            self.lod1 = LevelOfDetail(self.ax1)
         
         self.set_status(-1)
         
@@ -460,6 +508,13 @@ class DataExtractor(BaseEventHandler):
         140: 'drag to select',
         }
     
+    def _new_axis_key(self):
+        # the smallest axis number not used yet; there is no upper limit
+        n = 0
+        while str(n) in self.axes:
+            n += 1
+        return str(n)
+    
     def set_status(self, code, **kwargs):
         self.status = code
         title = self.__class__.status_title[code]
@@ -516,7 +571,7 @@ class DataExtractor(BaseEventHandler):
     def onkeypress(self, event):
         if self.status == -1: # initial state
             if event.key in '0123456789': # axis number
-                self.fig.suptitle('available axes numbers include: ' + ' '.join(self.axes.keys()))
+                self.fig.suptitle('available axes numbers include: ' + ' '.join(sorted(self.axes.keys(), key=int)))
         
             self.fig.canvas.draw()
     
@@ -548,32 +603,43 @@ class DataExtractor(BaseEventHandler):
     
     def onkeyrelease(self, event):
         if self.status == -1: # initial state
-            if event.key in '0123456789': # axis number
-                if event.key not in self.axes: 
+            if event.key in '0123456789': # axis number, possibly with more than one digit
+                self._axis_input += event.key
+                longer = [key for key in self.axes if key != self._axis_input and key.startswith(self._axis_input)]
+                if self._axis_input in self.axes and not longer: # load one saved axis
+                    self._change_current_axis(self._axis_input)
+                    self._axis_input = ''
+                elif longer:
+                    self.fig.suptitle(f'axis number: {self._axis_input} (continue typing, or press Enter to confirm)')
+                else:
+                    self._axis_input = ''
+                    self.set_status(-1)
+                self.fig.canvas.draw()
+                return
+            
+            axis_input, self._axis_input = self._axis_input, ''
+            if event.key == 'enter' and axis_input:
+                if axis_input in self.axes:
+                    self._change_current_axis(axis_input)
+                else:
                     self.set_status(-1)
-                else: # load one saved axis
-                    self._change_current_axis(event.key)
                     
             elif event.key == 'a':
-                for n in '0123456789':
-                    if n not in self.axes:
-                        self.axes[n] = {
-                            'x_cal': {
-                                'pos': [], # x position on the plot
-                                'data': [], # real data
-                                },
-                            'y_cal': {
-                                'pos': [], # y position on the plot
-                                'data': [], # real data
-                                },
-                            'xlim': [-np.inf, np.inf],
-                            'ylim': [-np.inf, np.inf],
-                            }
-                        self._ca = n
-                        self.set_status(100)
-                        break
-                else:
-                    raise NotImplementedError('maximum number of axes exceeded')
+                n = self._new_axis_key()
+                self.axes[n] = {
+                    'x_cal': {
+                        'pos': [], # x position on the plot
+                        'data': [], # real data
+                        },
+                    'y_cal': {
+                        'pos': [], # y position on the plot
+                        'data': [], # real data
+                        },
+                    'xlim': [-np.inf, np.inf],
+                    'ylim': [-np.inf, np.inf],
+                    }
+                self._ca = n
+                self.set_status(100)
             elif event.key == 's':
                 self.save()
                 self.fig.suptitle(f"axis information saved to '{self.savepath}'")
@@ -626,14 +692,10 @@ class DataExtractor(BaseEventHandler):
                     
                     self.plot_data()
                 elif event.key == 'u': # duplicate axis
-                    for n in '0123456789':
-                        if n not in self.axes:
-                            self.axes[n] = deepcopy(self.ca)
-                            self._next_axis = n
-                            self.set_status(130)
-                            break
-                    else:
-                        raise NotImplementedError('maximum number of axes exceeded')
+                    n = self._new_axis_key()
+                    self.axes[n] = deepcopy(self.ca)
+                    self._next_axis = n
+                    self.set_status(130)
                 elif event.key == 'e': # export all
                     self.export()
                     self.fig.suptitle(f"data exported to '{self.exportpath}'")
@@ -717,88 +779,19 @@ class DataExtractor(BaseEventHandler):
             print(errmsg)
             self.fig.canvas.draw()
            
-    scale_func = {
-        'linear': lambda x: x,
-        'log': np.log10,
-        } 
-    scale_inv_func = {
-        'linear': lambda x: x,
-        'log': lambda x: 10**np.array(x),
-        } 
-
-    @classmethod
-    def get_coeffs_auto(cls, xs, xds, err=1e-5):
-        if len(xs) != len(xds):
-            raise ValueError('expected xs, xds with the same shape')
-        if len(xs) < 2:
-            return None, None, None
-        
-        # TODO: support interpolation calibration?
-        # automatically choose linear or log scale, and check consistency 
-        for scale, xfunc in cls.scale_func.items():
-            ks = np.diff(xfunc(xds)) / np.diff(xs)
-            
-            # 1: unique
-            # k = np.unique(ks)
-            # if k.size == 1:
-            #     k = k[0]
-            #     b = xds[0] - k * xs[0]
-            #     return k, b, scale
-                
-            # 2: allow error
-            k = np.mean(ks)
-            if (np.max(ks) - np.min(ks)) / np.abs(k) < err:
-                b = np.mean(xfunc(xds)[:-1] - ks * xs[:-1])
-                return k, b, scale
-                
-        else:
-            raise ConsistencyError(f"inconsistent data: {xs} and {xds}")
-        
-    @staticmethod
-    def get_coeffs(x1, x2, xd1, xd2, scale='linear'):
-        if scale == 'linear':
-            pass
-        elif scale == 'log':
-            x1, x2 = np.log10(x1), np.log(x2)
-        else:
-            raise ValueError(f"unknown scale '{scale}'")
-        
-        k = (xd2 - xd1) / (x2 - x1)
-        b = xd1 - k * x1
-    
-        return k, b
-    
     def get_data(self):
         # get calibrated data
         x0, x1 = self.ca['xlim']
         y0, y1 = self.ca['ylim']
-        selected = rect_filter_objects(self.objects, x0, x1, y0, y1, mode=self.select_mode)
-        
-        out_data = {'l': [], 's': []}
-        out_info = {'l': [], 's': []}
-        
-        self.export_data[self._ca] = {'lines': [], 'scatters': []}
-        typecode_translate = {'l': 'lines', 's': 'scatters'}
-        
-        for typ in ['l', 's']: # line, scatter
-            for obj, sel in zip(self.objects[typ], selected[typ]):
-                if sel:
-                    data_coords = self.transform(*obj['coords'])
-                    out_data[typ].append(data_coords)
-                    info = {'linestyle': dedup(obj['artist'].get_linestyle()),
-                            'linewidth': dedup(obj['artist'].get_linewidth())}
-                    info.update(get_color(obj['artist']))
-                    # if typ == 's':
-                    #     info.update({'s': obj['artist'].get_sizes()})
-                    out_info[typ].append(info)
-                    
-                    export_dict = {
-                        'x': data_coords[0],
-                        'y': data_coords[1],
-                        }
-                    export_dict.update(info)
-                    self.export_data[self._ca][typecode_translate[typ]].append(export_dict)
-                    
+        if self.select_mode == 'touch':
+            selected = rect_select_indexed(self.index, x0, x1, y0, y1)
+        else:
+            selected = rect_filter_objects(self.objects, x0, x1, y0, y1, mode=self.select_mode)
+        
+        calib = ((self.xk, self.xb, self.xscale), (self.yk, self.yb, self.yscale))
+        out_data, out_info = self.collect_data(selected, calib)
+        self.export_data[self._ca] = self.get_export_entry(out_data, out_info)
+        
         # self.export_data[self._ca] = {
         #     'axis_number': self._ca,
         #     'lines_data': out_data['l'],
@@ -812,47 +805,40 @@ class DataExtractor(BaseEventHandler):
         # plot calibrated data
         if self.xscale is not None and self.yscale is not None:
             self.ax1.clear()
+            if self.lod1 is not None:
+                self.lod1.clear()
             out_data, out_info = self.get_data()
             # print(out_data, out_info)
             for (x, y), info in zip(out_data['s'], out_info['s']):
-                self.ax1.scatter(x, y, fc=info['facecolor'], ec=info['edgecolor']) # , s=info['s']
+                collection = self.ax1.scatter(x, y, fc=info['facecolor'], ec=info['edgecolor']) # , s=info['s']
+                if self.lod1 is not None:
+                    self.lod1.add_scatter(collection)
             for (x, y), info in zip(out_data['l'], out_info['l']):
-                self.ax1.plot(x, y, color=info['color'], linestyle=info['linestyle'], linewidth=info['linewidth'])
+                line, = self.ax1.plot(x, y, color=info['color'], linestyle=info['linestyle'], linewidth=info['linewidth'])
+                if self.lod1 is not None:
+                    self.lod1.add_line(line)
             self.ax1.set_xscale(self.xscale)
             self.ax1.set_yscale(self.yscale)
             self.ax1.grid()
+            if self.lod1 is not None:
+                self.lod1.update()
         
     def transform(self, x, y):
-        x, y = np.array(x), np.array(y)
-        func = self.__class__.scale_inv_func
-        return [func[self.xscale](self.xk * x + self.xb),
-                func[self.yscale](self.yk * y + self.yb)]
+        calib = ((self.xk, self.xb, self.xscale), (self.yk, self.yb, self.yscale))
+        return self.__class__.apply_calibration(x, y, calib)
     
     def save(self):
         # print(self.axes)
-        with open(self.savepath, 'w') as f:
-            json.dump(self.axes, f,
-                      indent=2,
-                      # default=lambda x: x.tolist() if isinstance(x, np.ndarray) else x,
-                      )
+        self.store.save_axes(self.pdf_path, self.axes, page=self.page)
         print(f"axis information saved to '{self.savepath}'")
             
     def load(self):
-        if not os.path.exists(self.savepath):
-            return {}
-        with open(self.savepath) as f:
-            return json.load(f)
+        return self.store.load_axes(self.pdf_path, page=self.page)
         
     def export(self):
-        for ca in self.axes:
-            self._ca = ca
-            self.calibrate()
-            if self.xscale and self.yscale:
-                self.get_data()
-        with open(self.exportpath, 'w') as f:
-            json.dump(self.export_data, f,
-                      default=lambda x: x.tolist() if isinstance(x, np.ndarray) else x,
-                      )
+        # the current axis is left untouched
+        self.export_axes(self.axes)
+        self.store.save_export(self.pdf_path, self.export_data, page=self.page)
         print(f"data exported to '{self.exportpath}'")
         
             
\ No newline at end of file
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+background precomputation for the interactive steps
+
+``generalUI.runall`` starts a ``Precomputer`` as soon as the drawings are loaded. Paths are
+parsed (coordinates, features and artists, see ``drawing.parse_paths``) and their features
+hashed for the marker library while the user is still answering prompts; after grouping,
+the vertex index of the objects is built while the user selects data. Each step then uses
+these results instead of computing them again.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from .drawing import parse_paths
+from .filter import build_vertex_index
+from .progress import CancelToken
+
+class Precomputer():
+    '''
+    Compute results needed by the interactive steps in a background thread.
+
+    Jobs are run one by one in the order they are submitted. Their results are
+    available as ``concurrent.futures.Future`` objects (see ``future`` and ``get``);
+    exceptions are raised when the result is asked for.
+
+    Parameters
+    ----------
+    paths : list
+        The paths (after deduplication, if any).
+    workers : int, optional
+        Number of processes for parsing paths, see ``drawing.parse_paths``. The default is None.
+    library : markerlib.MarkerLibrary, optional
+        If given, the signatures of the path features are also computed (see ``markerlib.feature_signatures``).
+    '''
+
+    def __init__(self, paths, workers=None, library=None):
+        self.paths = paths
+        self.workers = workers
+        self.cancel = CancelToken() # stops parsing if closed before it is finished
+        self._futures = {}
+        self._jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='vpextractor-precompute', daemon=True)
+        self.thread.start()
+
+        self.submit('parsed', parse_paths, paths, workers=workers, cancel=self.cancel)
+        if library is not None:
+            self.submit('signatures', self._signatures)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, func, args, kwargs = job
+            if not future.set_running_or_notify_cancel(): # cancelled
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, name, func, *args, **kwargs):
+        # run func(*args, **kwargs) in the background; its result is saved as `name`
+        future = Future()
+        self._futures[name] = future
+        self._jobs.put((future, func, args, kwargs))
+        return future
+
+    def future(self, name):
+        return self._futures[name]
+
+    def get(self, name):
+        # the result of `name`, waiting for it if needed
+        return self._futures[name].result()
+
+    def _signatures(self):
+        from .markerlib import feature_signatures
+        return feature_signatures([parsed[3] for parsed in self.get('parsed')])
+
+    def index(self, objects):
+        # build the vertex index of all objects (see filter.build_vertex_index) in the background
+        return self.submit('index', build_vertex_index, objects)
+
+    def close(self):
+        # cancel jobs not started yet (and parsing, if not finished), and stop the thread when the current job is finished
+        for future in self._futures.values():
+            future.cancel()
+        self.cancel.cancel()
+        self._jobs.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+progress reporting and cooperative cancellation of long stages
+
+Long stages (``fileio.pdf2drawings``, ``drawing.split_broken_paths``, ``drawing.parse_paths``,
+``drawing.plot_paths`` and ``drawing.group_paths``) take the optional arguments
+
+- ``progress``: a callable ``progress(stage, done, total)`` called after each chunk of work,
+  where ``total`` is None if it is not known (e.g., while streaming SVG files);
+- ``cancel``: a ``CancelToken``, checked between chunks; ``Cancelled`` is raised if it is cancelled
+  (or its time limit has passed).
+
+``ProgressLine`` shows the progress as a line in the terminal.
+"""
+
+import sys
+import time
+
+class Cancelled(Exception):
+    '''The work was cancelled by a ``CancelToken``.'''
+    pass
+
+class CancelToken():
+    '''
+    A flag to stop long stages between chunks of work.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        If given, the token is cancelled after this many seconds (e.g., a time limit of a figure).
+    '''
+
+    def __init__(self, timeout=None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (self.deadline is not None and time.monotonic() > self.deadline)
+
+    def check(self):
+        # raise Cancelled if cancelled
+        if self._cancelled:
+            raise Cancelled('cancelled')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise Cancelled('time limit exceeded')
+
+def report(progress, cancel, stage, done, total=None):
+    # report progress (if any hook is given) and check the cancel token (if given); called between chunks of work
+    if progress is not None:
+        progress(stage, done, total)
+    if cancel is not None:
+        cancel.check()
+
+def iterate(items, stage, progress=None, cancel=None, total=None, every=1000):
+    '''
+    iterate over items, reporting the number of items done after every `every` items and at the end (see ``report``)
+
+    `total` is the length of `items` if not given (None if it has no length).
+    '''
+    if total is None and hasattr(items, '__len__'):
+        total = len(items)
+    report(progress, cancel, stage, 0, total)
+    done = 0
+    for item in items:
+        yield item
+        done += 1
+        if done % every == 0:
+            report(progress, cancel, stage, done, total)
+    if done % every:
+        report(progress, cancel, stage, done, total)
+
+class ProgressLine():
+    '''
+    A progress hook that shows the stage and number of items done as one line in the terminal,
+    e.g., "parsing: 12000/63000 (19%)". A new line is started when the stage changes.
+
+    Parameters
+    ----------
+    file : file-like, optional
+        Where to write. The default is sys.stderr.
+    interval : float, optional
+        Minimum time (in seconds) between updates of the line. The default is 0.1.
+    '''
+
+    def __init__(self, file=None, interval=.1):
+        self.file = sys.stderr if file is None else file
+        self.interval = interval
+        self.stage = None
+        self.last = 0.
+
+    def __call__(self, stage, done, total):
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if stage == self.stage and not finished and now - self.last < self.interval:
+            return
+        if stage != self.stage and self.stage is not None:
+            self.file.write('\n')
+        self.stage = stage
+        self.last = now
+        if total is None:
+            line = f'{stage}: {done}'
+        else:
+            line = f'{stage}: {done}/{total} ({done / total:.0%})' if total else f'{stage}: {done}/{total}'
+        self.file.write('\r' + line)
+        if finished:
+            self.file.write('\n')
+            self.stage = None
+        self.file.flush()
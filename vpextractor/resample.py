@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+resampling extracted lines onto a common grid, vectorized with numpy
+
+Lines are interpolated in the space of the axis scales (i.e., log10 of the data for log
+axes). A line whose x does not only increase or only decrease (e.g., a loop) is split into
+monotonic runs at its turning points, each of which is resampled as a separate row.
+"""
+
+import numpy as np
+
+_scale_func = {
+    'linear': lambda x: x,
+    'log': np.log10,
+    }
+_scale_inv_func = {
+    'linear': lambda x: x,
+    'log': lambda x: 10**x,
+    }
+
+def monotonic_runs(x, sizes):
+    '''
+    split lines into runs where x only increases or only decreases
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x of the lines concatenated.
+    sizes : array-like of int
+        Number of points of each line.
+
+    Returns
+    -------
+    starts, ends : numpy.ndarray
+        The first and last (inclusive) point of each run; a turning point is the end of a run
+        and the start of the next one.
+    lines : numpy.ndarray
+        The line of each run.
+    '''
+    sizes = np.asarray(sizes, dtype=int)
+    line_starts = np.cumsum(sizes) - sizes
+    line_of = np.repeat(np.arange(sizes.size), sizes)
+    sign = np.sign(np.diff(x))
+    sign[line_of[1:] != line_of[:-1]] = 0 # between lines
+    # points where the direction changes (ignoring flat parts), within the same line
+    moving = np.flatnonzero(sign)
+    turns = moving[1:][(sign[moving[1:]] != sign[moving[:-1]]) & (line_of[moving[1:]] == line_of[moving[:-1]])]
+
+    starts = np.concatenate([line_starts[sizes > 0], turns])
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    is_turn = np.concatenate([np.zeros(np.count_nonzero(sizes > 0), dtype=bool), np.ones(turns.size, dtype=bool)])[order]
+    line_ends = line_starts + sizes - 1
+    ends = line_ends[line_of[starts]]
+    ends[:-1] = np.where(is_turn[1:], starts[1:], ends[:-1])
+    return starts, ends, line_of[starts]
+
+def resample_lines(xs, ys, grid, xscale='linear', yscale='linear'):
+    '''
+    resample lines onto a common grid of x at once
+
+    Parameters
+    ----------
+    xs, ys : list of array-like
+        Data of the lines.
+    grid : array-like
+        The x to resample at (data units).
+    xscale, yscale : str, optional
+        'linear' or 'log': the lines are interpolated linearly in this space. The default is 'linear'.
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Array of shape (number of runs, len(grid)): y of each monotonic run (see ``monotonic_runs``)
+        at the grid, or NaN outside the run.
+    lines : numpy.ndarray
+        The index (in `xs`) of the line of each row of `y`.
+    '''
+    grid = np.asarray(grid, dtype=float)
+    sizes = np.array([np.size(x) for x in xs], dtype=int)
+    if sizes.sum() == 0:
+        return np.empty((0, grid.size)), np.empty(0, dtype=int)
+    with np.errstate(divide='ignore', invalid='ignore'): # non-positive data of log axes become NaN
+        x = _scale_func[xscale](np.concatenate([np.ravel(x) for x in xs]).astype(float))
+        y = _scale_func[yscale](np.concatenate([np.ravel(y) for y in ys]).astype(float))
+        g = _scale_func[xscale](grid)
+
+    # gather the points of each run in increasing x (turning points are in two runs)
+    starts, ends, lines = monotonic_runs(x, sizes)
+    lengths = ends - starts + 1
+    run_starts = np.cumsum(lengths) - lengths
+    run_of = np.repeat(np.arange(starts.size), lengths)
+    step = np.arange(lengths.sum()) - run_starts[run_of]
+    decreasing = x[ends] < x[starts]
+    idx = np.where(decreasing[run_of], ends[run_of] - step, starts[run_of] + step)
+    rx, ry = x[idx], y[idx]
+
+    # query each run only at the grid x within its range; the point before grid x j in a run is the last one
+    # with (number of grid x smaller than it) <= j, so the sort keys (run, that number) find them all at once
+    order = np.argsort(g)
+    gs = g[order]
+    first, last = run_starts, run_starts + lengths - 1
+    j0 = np.searchsorted(gs, rx[first], side='left')
+    j1 = np.searchsorted(gs, rx[last], side='right')
+    counts = np.maximum(j1 - j0, 0)
+    query_runs = np.repeat(np.arange(starts.size), counts)
+    query_j = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + j0[query_runs]
+    keys = run_of * (gs.size + 1) + np.searchsorted(gs, rx, side='left')
+    lo = np.searchsorted(keys, query_runs * (gs.size + 1) + query_j, side='right') - 1
+    hi = np.minimum(lo + 1, last[query_runs])
+    gq = gs[query_j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(hi > lo, (gq - rx[lo]) / (rx[hi] - rx[lo]), 0.)
+        values = _scale_inv_func[yscale](ry[lo] + t * (ry[hi] - ry[lo]))
+    out = np.full((starts.size, g.size), np.nan)
+    out[query_runs, order[query_j]] = values
+    return out, lines
+
+def common_grid(xs, num=200, scale='linear'):
+    # `num` x evenly spaced (in the space of the scale) over the range of the lines
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = _scale_func[scale](np.concatenate([np.ravel(x) for x in xs] + [[]]).astype(float))
+    x = x[np.isfinite(x)]
+    if x.size == 0:
+        return np.empty(0)
+    return _scale_inv_func[scale](np.linspace(x.min(), x.max(), num))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+carrying results over to a revised figure
+
+Identified types (the ``.typ`` file) and selections refer to paths by their positions in the
+drawings, so they no longer apply once a figure is regenerated. Paths of the new drawings
+are matched to the old ones by content fingerprints (quantized geometry and style, see
+``path_keys``): unchanged paths, and paths that only moved (same shape and style at
+another position). What was done for them is carried over, and only new paths are left
+for the user.
+"""
+
+import numpy as np
+from collections import defaultdict, deque
+from .drawing import _geometry_key, _hashable, _stroke_keys, _fill_keys
+
+def _style_key(path):
+    return tuple(_hashable(path.get(key)) for key in ('type',) + _stroke_keys + _fill_keys)
+
+def _shape_key(items, decimals):
+    # like drawing._geometry_key, but with points relative to the first one, so that it does not change when the path moves
+    kinds = tuple(item[0] for item in items)
+    vertices = []
+    for item in items:
+        if item[0] == 're':
+            vertices.extend(item[1][:4])
+        elif item[0] == 'qu':
+            for pt in item[1]:
+                vertices.extend((pt[0], pt[1]))
+        else:
+            for pt in item[1:]:
+                vertices.extend((pt[0], pt[1]))
+    vertices = np.array(vertices, dtype=float).reshape(-1, 2)
+    if len(vertices):
+        vertices = vertices - vertices[0]
+    return kinds, (np.round(vertices, decimals) + 0.).tobytes()
+
+def path_keys(paths, decimals=2):
+    '''
+    content fingerprints of paths
+
+    Returns
+    -------
+    exact : list
+        Keys of the geometry (points rounded to `decimals`, see ``drawing.remove_duplicate_paths``) and style of each path.
+    shape : list
+        Keys of the shape (points relative to the first one) and style of each path.
+    '''
+    exact, shape = [], []
+    for path in paths:
+        style = _style_key(path)
+        exact.append((_geometry_key(path['items'], decimals), style))
+        shape.append((_shape_key(path['items'], decimals), style))
+    return exact, shape
+
+def match_paths(old_paths, new_paths, decimals=2):
+    '''
+    match paths of revised drawings to the old ones
+
+    Paths with the same geometry and style are matched first, then paths with the same
+    shape and style (moved). Paths with the same key are matched in the order they are drawn.
+
+    Parameters
+    ----------
+    old_paths, new_paths : list
+        The paths.
+    decimals : int, optional
+        Points (in page coordinates) are rounded to this number of decimals. The default is 2.
+
+    Returns
+    -------
+    old_idx : numpy.ndarray
+        ``new_paths[i]`` is ``old_paths[old_idx[i]]``, or new if ``old_idx[i] == -1``.
+    moved : numpy.ndarray
+        Whether ``new_paths[i]`` is an old path that moved.
+    '''
+    old_exact, old_shape = path_keys(old_paths, decimals)
+    new_exact, new_shape = path_keys(new_paths, decimals)
+    old_idx = np.full(len(new_paths), -1, dtype=int)
+    moved = np.zeros(len(new_paths), dtype=bool)
+    used = np.zeros(len(old_paths), dtype=bool)
+
+    todo = defaultdict(deque)
+    for j, key in enumerate(old_exact):
+        todo[key].append(j)
+    for i, key in enumerate(new_exact):
+        if todo[key]:
+            old_idx[i] = j = todo[key].popleft()
+            used[j] = True
+
+    todo = defaultdict(deque)
+    for j in np.flatnonzero(~used):
+        todo[old_shape[j]].append(j)
+    for i in np.flatnonzero(old_idx < 0):
+        key = new_shape[i]
+        if todo[key]:
+            old_idx[i] = todo[key].popleft()
+            moved[i] = True
+    return old_idx, moved
+
+def carry_types(types, old_idx):
+    # types (see mplui.ElementIdentifier) of the new paths: those of the matched old paths, and 'u' for new paths
+    types = np.frombuffer(types.encode() if isinstance(types, str) else bytes(types), dtype='S1')
+    new_types = np.full(len(old_idx), b'u', dtype='S1')
+    new_types[old_idx >= 0] = types[old_idx[old_idx >= 0]]
+    return new_types
+
+def carry_selection(selection, objects, old_idx):
+    '''
+    the selection of new objects, see ``filter.selection_record``
+
+    Parameters
+    ----------
+    selection : dict
+        The selection saved for the old objects, see ``filter.selection_record``.
+    objects : dict
+        The new objects, see ``drawing.group_paths``.
+    old_idx : numpy.ndarray
+        The old paths matched to the paths of the new objects, see ``match_paths``.
+
+    Returns
+    -------
+    selected : dict
+        Boolean masks of the new objects: whether all paths of an object are old paths that were selected.
+    new : dict
+        Boolean masks of the new objects that are made of any new path.
+    '''
+    selected_paths = {i for typ_paths in selection['paths'].values() for path_idxs in typ_paths for i in path_idxs}
+    selected, new = {}, {}
+    for typ, typ_objs in objects.items():
+        selected[typ] = np.zeros(len(typ_objs), dtype=bool)
+        new[typ] = np.zeros(len(typ_objs), dtype=bool)
+        for k, obj in enumerate(typ_objs):
+            olds = old_idx[obj['paths']]
+            new[typ][k] = np.any(olds < 0)
+            selected[typ][k] = not new[typ][k] and all(j in selected_paths for j in olds.tolist())
+    return selected, new
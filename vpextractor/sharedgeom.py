@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+geometry and features of parsed paths in shared memory, so that worker
+processes can write their results in place instead of pickling them back
+"""
+
+import numpy as np
+from multiprocessing import shared_memory
+
+KINDS = ('c', 'l', 'qu', 're') # item types, in the order given by np.unique (as in drawing.parse_path_geometry)
+KIND_BITS = {kind: 1 << i for i, kind in enumerate(KINDS)}
+MAX_COORDS = {'c': 2, 'l': 2, 'qu': 4, 're': 5} # max number of coords added by an item (see drawing.get_coords)
+
+def max_coords(path):
+    # upper limit of the number of coords of a path
+    return sum(MAX_COORDS.get(item[0], 0) for item in path['items'])
+
+def kinds_to_item_type(bits):
+    return {kind for kind in KINDS if bits & KIND_BITS[kind]}
+
+class SharedGeometry():
+    '''
+    coords and features of many paths, stored in shared memory blocks.
+
+    The arrays are numpy views of the shared memory:
+
+    - ``xy``: shape (nvert, 2), coords of all paths; coords of path ``i`` are
+      ``xy[offsets[i]:offsets[i] + counts[i]]``
+    - ``rel``: shape (nvert, 2), coords relative to the leftmost point of each path
+      (``path_feature['rel_pos']``)
+    - ``offsets``, ``counts``: shape (npath,)
+    - ``kinds``: shape (npath,), bit flags of the item types of each path (see ``KIND_BITS``)
+
+    A worker process attaches to the blocks with ``SharedGeometry.attach(geom.spec)``.
+    When the workers are done, ``detach`` copies the arrays out of the blocks and frees them.
+    '''
+
+    def __init__(self, npath, nvert, names=None):
+        self.npath, self.nvert = npath, nvert
+        self.layout = {
+            'xy': ((nvert, 2), np.float64),
+            'rel': ((nvert, 2), np.float64),
+            'offsets': ((npath,), np.int64),
+            'counts': ((npath,), np.int64),
+            'kinds': ((npath,), np.uint8),
+            }
+        create = names is None
+        self.blocks = {}
+        for name, (shape, dtype) in self.layout.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            if create:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                # worker processes share the resource tracker of the creator, which unlinks the block
+                block = shared_memory.SharedMemory(name=names[name])
+            self.blocks[name] = block
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+    @classmethod
+    def from_counts(cls, counts):
+        # allocate for paths with at most `counts` coords each
+        counts = np.asarray(counts, dtype=np.int64)
+        geom = cls(len(counts), int(counts.sum()))
+        geom.offsets[:] = np.cumsum(counts) - counts
+        geom.counts[:] = 0
+        return geom
+
+    @property
+    def spec(self):
+        # what a worker needs to attach to the blocks (picklable)
+        return self.npath, self.nvert, {name: block.name for name, block in self.blocks.items()}
+
+    @classmethod
+    def attach(cls, spec):
+        npath, nvert, names = spec
+        return cls(npath, nvert, names=names)
+
+    def write(self, i, item_type, coords, path_feature):
+        # write the results of drawing.parse_path_geometry for path i
+        x, y = coords
+        n = len(x)
+        o = self.offsets[i]
+        self.xy[o:o + n, 0] = x
+        self.xy[o:o + n, 1] = y
+        self.rel[o:o + n] = path_feature['rel_pos'].T
+        self.counts[i] = n
+        self.kinds[i] = sum(KIND_BITS[kind] for kind in item_type)
+
+    def coords(self, i):
+        # views, in the same format as coords of parse_path
+        o, n = self.offsets[i], self.counts[i]
+        return [self.xy[o:o + n, 0], self.xy[o:o + n, 1]]
+
+    def rel_pos(self, i):
+        o, n = self.offsets[i], self.counts[i]
+        return self.rel[o:o + n].T
+
+    def item_type(self, i):
+        return kinds_to_item_type(self.kinds[i])
+
+    def close(self):
+        # close access from this process; only use it when no views of the arrays are left (e.g., in workers)
+        for name in self.layout:
+            setattr(self, name, None)
+        for block in self.blocks.values():
+            block.close()
+
+    def unlink(self):
+        # remove the blocks once every process has attached; the memory is freed when all processes have closed them
+        for block in self.blocks.values():
+            block.unlink()
+
+    def detach(self):
+        # copy the arrays (one copy each) out of the blocks and close them, so that coords and features 
+        # outlive the shared memory; only use it when no views of the arrays are left
+        for name in self.layout:
+            setattr(self, name, getattr(self, name).copy())
+        for block in self.blocks.values():
+            block.close()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+simplification of dense polylines (Ramer-Douglas-Peucker), vectorized with numpy
+"""
+
+import numpy as np
+
+def segment_distances(x, y, i0, i1, idx):
+    # distances of points idx to the segments from i0 to i1 (arrays of the same shape)
+    # if a segment has zero length, the distance to its starting point is used
+    x0, y0 = x[i0], y[i0]
+    dx, dy = x[i1] - x0, y[i1] - y0
+    px, py = x[idx] - x0, y[idx] - y0
+    length = np.hypot(dx, dy)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        d = np.abs(dx * py - dy * px) / length
+    return np.where(length > 0, d, np.hypot(px, py))
+
+def rdp(x, y, tol, starts=None):
+    '''
+    simplify polylines with the Ramer-Douglas-Peucker algorithm
+
+    All segments are split at the same time at each step, so the number of
+    Python-level iterations is the depth of the recursion, not the number of points.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Coordinates of the points.
+    tol : float
+        Points are dropped only if they are within this distance of the simplified polyline.
+    starts : array-like of int, optional
+        Indexes of the first point of each polyline, if ``x`` and ``y`` are
+        several polylines concatenated. The default is None (one polyline).
+
+    Returns
+    -------
+    keep : numpy.ndarray
+        Boolean mask of the points kept.
+    max_deviation : float
+        Maximum distance of dropped points to the simplified polyline (0 if nothing is dropped).
+    '''
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = x.size
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep, 0.
+    starts = np.array([0] if starts is None else starts, dtype=int)
+    keep[starts] = True
+    keep[starts[1:] - 1] = True
+    keep[-1] = True
+
+    max_deviation = 0.
+    todo = np.flatnonzero(~keep) # points that may still be kept
+    while todo.size:
+        kept = np.flatnonzero(keep)
+        seg = np.searchsorted(kept, todo) - 1 # points in todo are between kept[seg] and kept[seg + 1]
+        d = segment_distances(x, y, kept[seg], kept[seg + 1], todo)
+
+        # farthest point of each segment: points of the same segment are contiguous in todo
+        first = np.flatnonzero(np.r_[True, seg[1:] != seg[:-1]])
+        sizes = np.diff(np.r_[first, todo.size])
+        dmax = np.maximum.reduceat(d, first)
+        farthest = np.flatnonzero(d == np.repeat(dmax, sizes))
+        farthest = farthest[np.r_[True, seg[farthest[1:]] != seg[farthest[:-1]]]] # the first one of each segment
+
+        split = dmax > tol
+        if np.any(~split):
+            max_deviation = max(max_deviation, dmax[~split].max())
+        keep[todo[farthest[split]]] = True
+        # points of segments that are not split are dropped for good
+        todo = todo[np.repeat(split, sizes)]
+        todo = todo[~keep[todo]]
+
+    return keep, float(max_deviation)
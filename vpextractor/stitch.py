@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+stitching line segments into polylines
+
+Some programs draw a long curve as many short paths (e.g., thousands of two-point
+segments). Lines with the same style whose endpoints coincide (within a tolerance) are
+joined, so that each curve becomes one object. Endpoints are looked up in a hash map
+keyed by their quantized positions, so this takes linear time.
+"""
+
+import numpy as np
+from copy import copy
+from matplotlib.lines import Line2D
+from matplotlib.colors import to_rgba
+
+def _style_key(artist):
+    return (to_rgba(artist.get_color(), artist.get_alpha()), float(artist.get_linewidth()), str(artist.get_linestyle()))
+
+def join_pieces(pieces):
+    '''
+    join polylines ((x, y) pairs), in this order, into one
+
+    Each piece is reversed if needed, so that it starts at the end of the previous one
+    (the nearer end of the second piece for the first one), and its first point is dropped.
+    '''
+    pieces = [(np.ravel(x).astype(float), np.ravel(y).astype(float)) for x, y in pieces]
+    if len(pieces) == 1:
+        return list(pieces[0])
+    def dist2(p, q):
+        return (p[0] - q[0])**2 + (p[1] - q[1])**2
+    (x, y), (x2, y2) = pieces[0], pieces[1]
+    if min(dist2((x[0], y[0]), (x2[i], y2[i])) for i in [0, -1]) < min(dist2((x[-1], y[-1]), (x2[i], y2[i])) for i in [0, -1]):
+        x, y = x[::-1], y[::-1]
+    xs, ys = [x], [y]
+    end = x[-1], y[-1]
+    for x, y in pieces[1:]:
+        if dist2(end, (x[-1], y[-1])) < dist2(end, (x[0], y[0])):
+            x, y = x[::-1], y[::-1]
+        xs.append(x[1:])
+        ys.append(y[1:])
+        end = x[-1], y[-1]
+    return [np.concatenate(xs), np.concatenate(ys)]
+
+def make_line_object(artists, pieces, path_idxs):
+    # one object of the lines (artists, their coords and the paths they are made of) joined in this order
+    x, y = join_pieces(pieces)
+    artist = copy(artists[0])
+    artist.set_data(x, y)
+    return {'artist': artist, 'coords': [x, y], 'paths': list(path_idxs)}
+
+def find_chains(ends, styles, tol):
+    '''
+    chains of lines joined at their ends
+
+    Two ends are joined if they have the same style, they are within `tol` of each other
+    (in both x and y), and no other end is. Ends are hashed by their positions in cells of
+    size `tol`, so only the 3x3 neighboring cells are looked up for each end.
+
+    Parameters
+    ----------
+    ends : numpy.ndarray
+        (N, 2, 2) array: the (x, y) of the first and last point of N lines.
+    styles : list
+        Hashable styles of the lines.
+    tol : float
+        Tolerance.
+
+    Returns
+    -------
+    chains : list
+        Lists of the indexes of the lines joined, in order along the chain.
+        Each line is in one chain (alone if not joined), and chains are ordered by their first line.
+    '''
+    if not tol > 0:
+        raise ValueError(f'tol should be positive, got {tol}')
+    n = len(ends)
+    style_ids = {}
+    styles = [style_ids.setdefault(style, len(style_ids)) for style in styles]
+    points = np.reshape(ends, (2 * n, 2)).tolist() # end e is side e % 2 of line e // 2
+    cells = np.floor(np.reshape(ends, (2 * n, 2)) / tol).astype(np.int64).tolist()
+    table = {}
+    for e, (cx, cy) in enumerate(cells):
+        table.setdefault((styles[e // 2], cx, cy), []).append(e)
+
+    # the other end near each end (or -1 if none, or more than one)
+    near = [-1] * (2 * n)
+    for e, (cx, cy) in enumerate(cells):
+        style = styles[e // 2]
+        x, y = points[e]
+        found = []
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                for other in table.get((style, cx + dx, cy + dy), ()):
+                    if other != e and abs(points[other][0] - x) <= tol and abs(points[other][1] - y) <= tol:
+                        found.append(other)
+        if len(found) == 1:
+            near[e] = found[0]
+    # join only pairs of ends that are the only one near each other, and not the two ends of a line
+    link = [-1] * (2 * n)
+    for e in range(2 * n):
+        other = near[e]
+        if other >= 0 and near[other] == e and other // 2 != e // 2:
+            link[e] = other
+
+    chains = []
+    visited = [False] * n
+    for i in range(n):
+        if visited[i]:
+            continue
+        # go back to the start of the chain (the line itself if it is a loop)
+        start, side = i, 0
+        while link[2 * start + side] >= 0:
+            prev = link[2 * start + side]
+            start, side = prev // 2, 1 - prev % 2
+            if start == i:
+                break
+        # then go forward
+        chain = []
+        line, side = start, side # enter `line` at `side`
+        while not visited[line]:
+            visited[line] = True
+            chain.append(line)
+            nxt = link[2 * line + 1 - side]
+            if nxt < 0:
+                break
+            line, side = nxt // 2, nxt % 2
+        chains.append(chain)
+    chains.sort(key=lambda chain: min(chain))
+    return chains
+
+def stitch_lines(objects, tol=0.05, types=('l',)):
+    '''
+    join lines with the same style whose ends coincide, see ``find_chains``
+
+    Parameters
+    ----------
+    objects : dict
+        Grouped objects, see ``drawing.group_paths``. Only objects drawn as ``Line2D`` are joined.
+    tol : float, optional
+        Tolerance (in points of the page) for the ends to coincide. The default is 0.05.
+    types : Iterable, optional
+        Types of objects to be stitched. The default is ('l',).
+
+    Returns
+    -------
+    objects : dict
+        New grouped objects, where lines joined are one object (with the paths of all of them);
+        objects of other types are the same.
+    '''
+    if not tol > 0:
+        raise ValueError(f'tol should be positive, got {tol}')
+    objects = dict(objects)
+    for typ in types:
+        typ_objs = objects[typ]
+        lines = [i for i, obj in enumerate(typ_objs) if isinstance(obj['artist'], Line2D) and np.size(obj['coords'][0]) >= 2]
+        if len(lines) < 2:
+            continue
+        ends = np.empty((len(lines), 2, 2))
+        for k, i in enumerate(lines):
+            x, y = typ_objs[i]['coords']
+            ends[k] = [[x[0], y[0]], [x[-1], y[-1]]]
+        styles = [_style_key(typ_objs[i]['artist']) for i in lines]
+
+        stitched = {} # first object in a chain: the joined object
+        joined = set()
+        for chain in find_chains(ends, styles, tol):
+            if len(chain) == 1:
+                continue
+            objs = [typ_objs[lines[k]] for k in chain]
+            stitched[lines[chain[0]]] = make_line_object([obj['artist'] for obj in objs], [obj['coords'] for obj in objs],
+                                                         [i for obj in objs for i in obj.get('paths', [])])
+            joined.update(lines[k] for k in chain)
+        objects[typ] = [stitched.get(i, obj) for i, obj in enumerate(typ_objs) if i in stitched or i not in joined]
+    return objects
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+where the results of each step are saved
+
+- ``SidecarStore``: files next to the figure file (``.drw``, ``.typ``, ``.mkr``,
+  ``.sel``, ``.axes`` and ``.out``), as in earlier versions. This is the default.
+- ``SQLiteStore``: one SQLite database for many figures, with one table per kind of
+  result keyed by document and page. Each save is one transaction, and axes and
+  exported data are written per axis.
+
+Both have the same methods, so that the steps do not need to know where things are saved.
+
+Selections are saved as the indexes of the selected objects (see ``filter.selection_record``).
+Selections saved by earlier versions (pickled objects, e.g., ``.sel.obj`` files) are still loaded,
+as the objects themselves.
+"""
+
+import os
+import json
+import pickle
+import sqlite3
+import numpy as np
+from .utils import save_pickle, load_pickle, pause_and_warn
+
+def _json_default(x):
+    return x.tolist() if isinstance(x, np.ndarray) else x
+
+def _confirm_overwrite(where):
+    pause_and_warn('{} already exists!'.format(where), choose='overwrite existing files?',
+                   default='n', yes_message='overwritten', no_message='raise')
+
+def open_store(store=None):
+    '''
+    get a store
+
+    Parameters
+    ----------
+    store : None, str or store, optional
+        None for ``SidecarStore()``; a path (usually ending with ".sqlite" or ".db") for ``SQLiteStore(store)``;
+        a store is returned as it is. The default is None.
+    '''
+    if store is None:
+        return SidecarStore()
+    elif isinstance(store, (str, os.PathLike)):
+        return SQLiteStore(store)
+    else:
+        return store
+
+class SidecarStore():
+    '''results saved to files next to the figure file'''
+    suffixes = {
+        'drawings': ['.drw'],
+        'identification': ['.mkr', '.typ'],
+        'selection': ['.sel', '.sel.obj'], # the latter from earlier versions
+        'axes': ['.axes'],
+        'export': ['.out'],
+        }
+
+    def basepath(self, doc, page=0):
+        return doc if page == 0 else f'{doc}.page{page}'
+
+    def files(self, kind, doc, page=0):
+        return [self.basepath(doc, page) + suffix for suffix in self.suffixes[kind]]
+
+    def location(self, kind, doc, page=0):
+        # where things are saved, for messages
+        return '" and "'.join(self.files(kind, doc, page))
+
+    def where(self, kind, doc, page=0):
+        return 'files "{}"'.format(self.location(kind, doc, page))
+
+    def exists(self, kind, doc, page=0):
+        return any(os.path.exists(path) for path in self.files(kind, doc, page))
+
+    def save_drawings(self, doc, paths, page=0, yes=False):
+        save_pickle(self.files('drawings', doc, page)[0], paths, yes=yes)
+
+    def load_drawings(self, doc, page=0):
+        return load_pickle(self.files('drawings', doc, page)[0])
+
+    def save_identification(self, doc, types, known_markers, page=0, yes=False):
+        # types: numpy array of dtype 'S1', see mplui.ElementIdentifier
+        marker_path, type_path = self.files('identification', doc, page)
+        for path in [type_path, marker_path]:
+            if not yes and os.path.exists(path):
+                _confirm_overwrite(f'File "{path}"')
+        with open(type_path, 'wb') as f:
+            f.write(types.tobytes())
+        with open(marker_path, 'w') as f:
+            json.dump(known_markers, f, default=_json_default)
+
+    def load_identification(self, doc, page=0):
+        marker_path, type_path = self.files('identification', doc, page)
+        with open(type_path) as f:
+            types = f.read()
+        with open(marker_path) as f:
+            known_markers = json.load(f)
+        return types, known_markers
+
+    def save_selection(self, doc, selection, page=0, yes=False):
+        # selection: see filter.selection_record
+        path = self.files('selection', doc, page)[0]
+        if not yes and os.path.exists(path):
+            _confirm_overwrite(f'File "{path}"')
+        with open(path, 'w') as f:
+            json.dump(selection, f)
+
+    def load_selection(self, doc, page=0):
+        # a selection record, or the objects if saved by earlier versions
+        path, old_path = self.files('selection', doc, page)
+        if not os.path.exists(path):
+            return load_pickle(old_path)
+        with open(path) as f:
+            return json.load(f)
+
+    def save_axes(self, doc, axes, page=0):
+        with open(self.files('axes', doc, page)[0], 'w') as f:
+            json.dump(axes, f, indent=2)
+
+    def load_axes(self, doc, page=0):
+        path = self.files('axes', doc, page)[0]
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_export(self, doc, export_data, page=0):
+        with open(self.files('export', doc, page)[0], 'w') as f:
+            json.dump(export_data, f, default=_json_default)
+
+    def load_export(self, doc, page=0):
+        with open(self.files('export', doc, page)[0]) as f:
+            return json.load(f)
+
+class SQLiteStore():
+    '''
+    results of many figures saved in one SQLite database
+
+    Documents are identified by their absolute paths and page numbers.
+    Drawings are saved one row per path (with its bounding box, so that they can be
+    queried without loading them), and axes and exported data one row per axis.
+
+    Parameters
+    ----------
+    path : str
+        Path to the database file. Created if it does not exist.
+    timeout : float, optional
+        Seconds to wait for other processes writing to the database (e.g., workers of ``batch.run_batch``).
+        The default is 60.
+    '''
+    schema = '''
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        UNIQUE (path, page));
+    CREATE TABLE IF NOT EXISTS drawings (
+        doc_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+        idx INTEGER NOT NULL,
+        seqno INTEGER,
+        type TEXT,
+        x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (doc_id, idx));
+    CREATE TABLE IF NOT EXISTS identifications (
+        doc_id INTEGER PRIMARY KEY REFERENCES documents (id) ON DELETE CASCADE,
+        types BLOB NOT NULL);
+    CREATE TABLE IF NOT EXISTS markers (
+        doc_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+        idx INTEGER NOT NULL,
+        match_by TEXT,
+        feature TEXT NOT NULL,
+        PRIMARY KEY (doc_id, idx));
+    CREATE TABLE IF NOT EXISTS selections (
+        doc_id INTEGER PRIMARY KEY REFERENCES documents (id) ON DELETE CASCADE,
+        objects BLOB NOT NULL);
+    CREATE TABLE IF NOT EXISTS axes (
+        doc_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+        key TEXT NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (doc_id, key));
+    CREATE TABLE IF NOT EXISTS exports (
+        doc_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+        key TEXT NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (doc_id, key));
+    '''
+    tables = { # the table that tells whether a kind of result exists
+        'drawings': 'drawings',
+        'identification': 'identifications',
+        'selection': 'selections',
+        'axes': 'axes',
+        'export': 'exports',
+        }
+
+    def __init__(self, path, timeout=60):
+        self.path = os.fspath(path)
+        self.conn = sqlite3.connect(self.path, timeout=timeout)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        with self.conn:
+            self.conn.executescript(self.schema)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def doc_id(self, doc, page=0, create=False):
+        doc = os.path.abspath(doc)
+        row = self.conn.execute('SELECT id FROM documents WHERE path = ? AND page = ?', (doc, page)).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self.conn.execute('INSERT INTO documents (path, page) VALUES (?, ?)', (doc, page)).lastrowid
+
+    def location(self, kind, doc, page=0):
+        return f'{self.path}: {self.tables[kind]} of {doc}, page {page}'
+
+    def where(self, kind, doc, page=0):
+        return f'table "{self.tables[kind]}" of "{self.path}" (document "{doc}", page {page})'
+
+    def exists(self, kind, doc, page=0):
+        doc_id = self.doc_id(doc, page)
+        if doc_id is None:
+            return False
+        return self.conn.execute(f'SELECT 1 FROM {self.tables[kind]} WHERE doc_id = ? LIMIT 1', (doc_id,)).fetchone() is not None
+
+    def _check_overwrite(self, kind, doc, page, yes):
+        if self.exists(kind, doc, page):
+            if yes:
+                print(f'OVERWRITTEN: {self.where(kind, doc, page)}')
+            else:
+                _confirm_overwrite(self.where(kind, doc, page).capitalize())
+
+    def save_drawings(self, doc, paths, page=0, yes=False):
+        self._check_overwrite('drawings', doc, page, yes)
+        rows = ((i, path.get('seqno'), path.get('type'), *(float(v) for v in tuple(path['rect'])),
+                 pickle.dumps(path))
+                for i, path in enumerate(paths))
+        with self.conn:
+            doc_id = self.doc_id(doc, page, create=True)
+            self.conn.execute('DELETE FROM drawings WHERE doc_id = ?', (doc_id,))
+            self.conn.executemany(
+                'INSERT INTO drawings (doc_id, idx, seqno, type, x0, y0, x1, y1, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((doc_id, *row) for row in rows))
+
+    def load_drawings(self, doc, page=0):
+        doc_id = self.doc_id(doc, page)
+        return [pickle.loads(data) for data, in self.conn.execute(
+            'SELECT data FROM drawings WHERE doc_id = ? ORDER BY idx', (doc_id,))]
+
+    def save_identification(self, doc, types, known_markers, page=0, yes=False):
+        self._check_overwrite('identification', doc, page, yes)
+        with self.conn:
+            doc_id = self.doc_id(doc, page, create=True)
+            self.conn.execute('INSERT OR REPLACE INTO identifications (doc_id, types) VALUES (?, ?)',
+                              (doc_id, types.tobytes()))
+            self.conn.execute('DELETE FROM markers WHERE doc_id = ?', (doc_id,))
+            self.conn.executemany(
+                'INSERT INTO markers (doc_id, idx, match_by, feature) VALUES (?, ?, ?, ?)',
+                ((doc_id, i, marker['match_by'], json.dumps(marker['feature'], default=_json_default))
+                 for i, marker in enumerate(known_markers)))
+
+    def load_identification(self, doc, page=0):
+        # the same formats as SidecarStore.load_identification
+        doc_id = self.doc_id(doc, page)
+        types, = self.conn.execute('SELECT types FROM identifications WHERE doc_id = ?', (doc_id,)).fetchone()
+        known_markers = [{'match_by': match_by, 'feature': json.loads(feature)} for match_by, feature in self.conn.execute(
+            'SELECT match_by, feature FROM markers WHERE doc_id = ? ORDER BY idx', (doc_id,))]
+        return types.decode(), known_markers
+
+    def save_selection(self, doc, selection, page=0, yes=False):
+        # selection: see filter.selection_record, saved as JSON text
+        self._check_overwrite('selection', doc, page, yes)
+        with self.conn:
+            doc_id = self.doc_id(doc, page, create=True)
+            self.conn.execute('INSERT OR REPLACE INTO selections (doc_id, objects) VALUES (?, ?)',
+                              (doc_id, json.dumps(selection)))
+
+    def load_selection(self, doc, page=0):
+        # a selection record, or the objects if saved by earlier versions (as a pickle)
+        doc_id = self.doc_id(doc, page)
+        selection, = self.conn.execute('SELECT objects FROM selections WHERE doc_id = ?', (doc_id,)).fetchone()
+        return json.loads(selection) if isinstance(selection, str) else pickle.loads(selection)
+
+    def _save_keyed(self, table, doc, page, data, default=None):
+        # one row per key; rows of keys no longer in data are removed
+        with self.conn:
+            doc_id = self.doc_id(doc, page, create=True)
+            self.conn.execute(f'DELETE FROM {table} WHERE doc_id = ? AND key NOT IN ({",".join("?" * len(data))})',
+                              (doc_id, *data.keys()))
+            self.conn.executemany(f'INSERT OR REPLACE INTO {table} (doc_id, key, data) VALUES (?, ?, ?)',
+                                  ((doc_id, key, json.dumps(value, default=default)) for key, value in data.items()))
+
+    def _load_keyed(self, table, doc, page):
+        doc_id = self.doc_id(doc, page)
+        return {key: json.loads(data) for key, data in self.conn.execute(
+            f'SELECT key, data FROM {table} WHERE doc_id = ? ORDER BY rowid', (doc_id,))}
+
+    def save_axes(self, doc, axes, page=0):
+        self._save_keyed('axes', doc, page, axes)
+
+    def load_axes(self, doc, page=0):
+        return self._load_keyed('axes', doc, page)
+
+    def save_export(self, doc, export_data, page=0):
+        self._save_keyed('exports', doc, page, export_data, default=_json_default)
+
+    def load_export(self, doc, page=0):
+        return self._load_keyed('exports', doc, page)
+
+    def documents(self):
+        '''
+        documents in the store, and what has been saved for them
+
+        Returns
+        -------
+        documents : list of dict
+            With keys "path", "page", "drawings" (number of drawings), "markers" (number of markers),
+            "axes" (number of axes), and "identification", "selection", "export" (bool).
+        '''
+        rows = self.conn.execute('''
+            SELECT d.path, d.page,
+                (SELECT COUNT(*) FROM drawings WHERE doc_id = d.id),
+                EXISTS (SELECT 1 FROM identifications WHERE doc_id = d.id),
+                (SELECT COUNT(*) FROM markers WHERE doc_id = d.id),
+                EXISTS (SELECT 1 FROM selections WHERE doc_id = d.id),
+                (SELECT COUNT(*) FROM axes WHERE doc_id = d.id),
+                EXISTS (SELECT 1 FROM exports WHERE doc_id = d.id)
+            FROM documents AS d ORDER BY d.path, d.page''')
+        keys = ['path', 'page', 'drawings', 'identification', 'markers', 'selection', 'axes', 'export']
+        return [{key: (bool(value) if key in ['identification', 'selection', 'export'] else value)
+                 for key, value in zip(keys, row)} for row in rows]
+
+    def query(self, sql, parameters=()):
+        # run any SQL query, e.g., ``store.query('SELECT COUNT(*) FROM drawings WHERE type = ?', ('s',))``
+        return self.conn.execute(sql, parameters).fetchall()
@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 2026
+
+@author: Yu-Chen Wang
+
+read drawings directly from SVG files, without rendering them with fitz
+
+The file is parsed incrementally: each element is converted to a drawing
+record (the same format as ``fitz.Page.get_drawings()``, which is what
+``drawing.parse_path`` consumes) as soon as it is closed, and is then
+dropped from the tree. Only shapes defined in ``<defs>``/``<symbol>`` (which
+may be referenced by ``<use>``) are kept in memory.
+
+Not supported: CSS style sheets (``<style>``), text, images, gradients and
+patterns (treated as no paint), clipping and masking.
+"""
+
+import re
+from functools import lru_cache
+from xml.etree.ElementTree import iterparse
+import numpy as np
+import fitz
+
+SHAPES = {'path', 'line', 'polyline', 'polygon', 'rect', 'circle', 'ellipse'}
+DEFINITIONS = {'defs', 'symbol'} # children are not rendered, but may be referenced
+NOT_RENDERED = {'clipPath', 'mask', 'pattern', 'marker', 'linearGradient', 'radialGradient',
+                'style', 'script', 'metadata', 'title', 'desc', 'text', 'image', 'foreignObject'}
+
+INHERITED = ('fill', 'stroke', 'stroke-width', 'stroke-opacity', 'fill-opacity',
+             'stroke-dasharray', 'stroke-dashoffset', 'fill-rule', 'stroke-linecap',
+             'stroke-linejoin', 'color', 'visibility')
+
+DEFAULT_STYLE = {
+    'fill': 'black',
+    'stroke': 'none',
+    'stroke-width': '1',
+    'stroke-opacity': '1',
+    'fill-opacity': '1',
+    'stroke-dasharray': 'none',
+    'stroke-dashoffset': '0',
+    'fill-rule': 'nonzero',
+    'stroke-linecap': 'butt',
+    'stroke-linejoin': 'miter',
+    'color': 'black',
+    'visibility': 'visible',
+    }
+
+LINECAPS = {'butt': 0, 'round': 1, 'square': 2}
+LINEJOINS = {'miter': 0, 'round': 1, 'bevel': 2}
+UNITS = {'': 1., 'px': 1., 'pt': 1., 'pc': 12., 'in': 72., 'cm': 72. / 2.54, 'mm': 72. / 25.4} # same as fitz
+
+KAPPA = 4 * (np.sqrt(2) - 1) / 3 # for drawing quarter circles with cubic Bezier curves
+
+IDENTITY = (1., 0., 0., 1., 0., 0.)
+
+_number = r'[-+]?(?:\d*\.\d+|\d+\.?)(?:[eE][-+]?\d+)?'
+_number_re = re.compile(_number)
+_path_token_re = re.compile(r'[MmLlHhVvCcSsQqTtAaZz]|' + _number)
+_transform_re = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+
+#%% helpers
+def _local(tag):
+    # tag without namespace
+    return tag.rsplit('}', 1)[-1]
+
+def _href(attrib):
+    for key, value in attrib.items():
+        if _local(key) == 'href':
+            return value
+    return None
+
+def parse_length(s, default=0.):
+    if s is None:
+        return default
+    match = re.fullmatch(r'\s*(' + _number + r')\s*([a-z%]*)\s*', s)
+    if match is None:
+        return default
+    value, unit = float(match.group(1)), match.group(2)
+    if unit == '%':
+        return default # relative lengths are not supported
+    return value * UNITS.get(unit, 1.)
+
+def parse_numbers(s):
+    if not s:
+        return []
+    return [float(num) for num in _number_re.findall(s)]
+
+def multiply(m1, m2):
+    # the transform that applies m2 first, then m1
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + c1 * b2, b1 * a2 + d1 * b2,
+            a1 * c2 + c1 * d2, b1 * c2 + d1 * d2,
+            a1 * e2 + c1 * f2 + e1, b1 * e2 + d1 * f2 + f1)
+
+def parse_transform(s):
+    m = IDENTITY
+    if not s:
+        return m
+    for name, args in _transform_re.findall(s):
+        args = parse_numbers(args)
+        if name == 'matrix' and len(args) == 6:
+            t = tuple(args)
+        elif name == 'translate' and args:
+            t = (1., 0., 0., 1., args[0], args[1] if len(args) > 1 else 0.)
+        elif name == 'scale' and args:
+            t = (args[0], 0., 0., args[1] if len(args) > 1 else args[0], 0., 0.)
+        elif name == 'rotate' and args:
+            a = np.radians(args[0])
+            t = (np.cos(a), np.sin(a), -np.sin(a), np.cos(a), 0., 0.)
+            if len(args) == 3:
+                cx, cy = args[1:]
+                t = multiply(multiply((1., 0., 0., 1., cx, cy), t), (1., 0., 0., 1., -cx, -cy))
+        elif name == 'skewX' and args:
+            t = (1., 0., np.tan(np.radians(args[0])), 1., 0., 0.)
+        elif name == 'skewY' and args:
+            t = (1., np.tan(np.radians(args[0])), 0., 1., 0., 0.)
+        else:
+            continue
+        m = multiply(m, t)
+    return m
+
+def viewbox_transform(attrib):
+    # transform set by the x, y, width, height and viewBox of a <svg> element
+    x, y = parse_length(attrib.get('x')), parse_length(attrib.get('y'))
+    m = (1., 0., 0., 1., x, y)
+    viewbox = parse_numbers(attrib.get('viewBox'))
+    if len(viewbox) != 4 or viewbox[2] <= 0 or viewbox[3] <= 0:
+        return m
+    vx, vy, vw, vh = viewbox
+    w = parse_length(attrib.get('width'), default=vw)
+    h = parse_length(attrib.get('height'), default=vh)
+    if attrib.get('preserveAspectRatio', '').strip().startswith('none'):
+        sx, sy = w / vw, h / vh
+        tx, ty = 0., 0.
+    else: # default "xMidYMid meet"
+        sx = sy = min(w / vw, h / vh)
+        tx, ty = (w - vw * sx) / 2, (h - vh * sy) / 2
+    return multiply(m, (sx, 0., 0., sy, tx - vx * sx, ty - vy * sy))
+
+def parse_style(attrib):
+    # presentation attributes, overridden by the "style" attribute
+    style = {key: attrib[key] for key in INHERITED + ('opacity', 'display') if key in attrib}
+    for decl in attrib.get('style', '').split(';'):
+        if ':' in decl:
+            key, value = decl.split(':', 1)
+            style[key.strip()] = value.strip()
+    for key, value in list(style.items()):
+        if value == 'inherit':
+            style.pop(key)
+    return style
+
+@lru_cache(maxsize=1024)
+def parse_color(s, current='black'):
+    # returns rgb tuple, or None if no paint
+    s = s.strip()
+    if s == 'currentColor':
+        s = current
+    if s in ('none', 'transparent') or s.startswith('url('):
+        return None
+    if s.startswith('#'):
+        h = s[1:]
+        if len(h) in (3, 4):
+            h = ''.join(c * 2 for c in h)
+        try:
+            return tuple(int(h[i:i + 2], 16) / 255 for i in (0, 2, 4))
+        except ValueError:
+            return None
+    if s.startswith('rgb'):
+        values = []
+        for part in s[s.find('(') + 1:s.rfind(')')].split(',')[:3]:
+            part = part.strip()
+            if part.endswith('%'):
+                values.append(float(part[:-1]) / 100)
+            else:
+                values.append(float(part) / 255)
+        return tuple(min(max(v, 0.), 1.) for v in values)
+    from matplotlib.colors import to_rgb # named colors (SVG uses the CSS names)
+    try:
+        return to_rgb(s)
+    except ValueError:
+        return None
+
+#%% geometry
+def path_segments(d):
+    '''
+    parse path data into subpaths.
+
+    Returns
+    -------
+    subpaths : list
+        list of ``(segments, closed)``, where segments is a list of ``('l', p0, p1)``
+        or ``('c', p0, p1, p2, p3)`` with points as ``(x, y)`` tuples in user space.
+    '''
+    tokens = _path_token_re.findall(d or '')
+    subpaths = []
+    segments = []
+    cmd = None
+    cur = start = (0., 0.)
+    last_ctrl = None # the last control point of the previous curve, for 'S' and 'T'
+    last_cmd = None
+    i = 0
+
+    def num():
+        nonlocal i
+        value = float(tokens[i])
+        i += 1
+        return value
+
+    def flag():
+        # arc flags may be written without separators, e.g. "a1 1 0 00 1 1"
+        nonlocal i
+        token = tokens[i]
+        if len(token) > 1 and token[0] in '01':
+            tokens[i] = token[1:]
+            return token[0] == '1'
+        i += 1
+        return float(token) != 0
+
+    degenerate = None # a zero-length line, only kept if it is the only segment of its subpath (e.g., a dot)
+
+    def finish(closed):
+        nonlocal segments, degenerate
+        if not segments and degenerate is not None:
+            segments = [degenerate]
+        if segments:
+            subpaths.append((segments, closed))
+        segments = []
+        degenerate = None
+
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            cmd = tokens[i]
+            i += 1
+        elif cmd is None:
+            break
+        rel = cmd.islower()
+        C = cmd.upper()
+        ox, oy = cur if rel else (0., 0.)
+        try:
+            if C == 'Z':
+                if cur != start:
+                    segments.append(('l', cur, start))
+                finish(closed=True)
+                cur = start
+                last_ctrl = None
+                last_cmd = C
+                cmd = None # a new command is required after closing
+                continue
+            elif C == 'M':
+                finish(closed=False)
+                cur = start = (ox + num(), oy + num())
+                cmd = 'l' if rel else 'L' # subsequent pairs are implicit lineto
+                last_ctrl = None
+            elif C in 'LHV':
+                if C == 'L':
+                    p = (ox + num(), oy + num())
+                elif C == 'H':
+                    p = (ox + num(), cur[1])
+                else:
+                    p = (cur[0], oy + num())
+                if p != cur: # repeated vertices (e.g., "L a L a") are dropped, as fitz does
+                    segments.append(('l', cur, p))
+                elif not segments:
+                    degenerate = ('l', cur, p)
+                cur = p
+                last_ctrl = None
+            elif C in 'CS':
+                if C == 'C':
+                    c1 = (ox + num(), oy + num())
+                elif last_cmd in 'CS' and last_ctrl is not None:
+                    c1 = (2 * cur[0] - last_ctrl[0], 2 * cur[1] - last_ctrl[1])
+                else:
+                    c1 = cur
+                c2 = (ox + num(), oy + num())
+                p = (ox + num(), oy + num())
+                segments.append(('c', cur, c1, c2, p))
+                cur, last_ctrl = p, c2
+            elif C in 'QT':
+                if C == 'Q':
+                    q = (ox + num(), oy + num())
+                elif last_cmd in 'QT' and last_ctrl is not None:
+                    q = (2 * cur[0] - last_ctrl[0], 2 * cur[1] - last_ctrl[1])
+                else:
+                    q = cur
+                p = (ox + num(), oy + num())
+                c1 = (cur[0] + 2 / 3 * (q[0] - cur[0]), cur[1] + 2 / 3 * (q[1] - cur[1]))
+                c2 = (p[0] + 2 / 3 * (q[0] - p[0]), p[1] + 2 / 3 * (q[1] - p[1]))
+                segments.append(('c', cur, c1, c2, p))
+                cur, last_ctrl = p, q
+            elif C == 'A':
+                rx, ry, phi = num(), num(), num()
+                large, sweep = flag(), flag()
+                p = (ox + num(), oy + num())
+                segments += arc_segments(cur, p, rx, ry, phi, large, sweep)
+                cur = p
+                last_ctrl = None
+            else:
+                break
+        except IndexError: # incomplete path data: keep what has been parsed
+            break
+        last_cmd = C
+    finish(closed=False)
+    return subpaths
+
+def arc_segments(p0, p1, rx, ry, phi, large, sweep):
+    # elliptical arc to cubic Bezier curves (SVG implementation notes, appendix B.2.4)
+    if p0 == p1:
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return [('l', p0, p1)]
+    phi = np.radians(phi % 360)
+    cos, sin = np.cos(phi), np.sin(phi)
+    dx, dy = (p0[0] - p1[0]) / 2, (p0[1] - p1[1]) / 2
+    x1, y1 = cos * dx + sin * dy, -sin * dx + cos * dy
+    lam = x1**2 / rx**2 + y1**2 / ry**2
+    if lam > 1:
+        rx, ry = rx * np.sqrt(lam), ry * np.sqrt(lam)
+    num = rx**2 * ry**2 - rx**2 * y1**2 - ry**2 * x1**2
+    den = rx**2 * y1**2 + ry**2 * x1**2
+    coef = np.sqrt(max(num, 0) / den) * (-1 if large == sweep else 1)
+    cx1, cy1 = coef * rx * y1 / ry, -coef * ry * x1 / rx
+    cx = cos * cx1 - sin * cy1 + (p0[0] + p1[0]) / 2
+    cy = sin * cx1 + cos * cy1 + (p0[1] + p1[1]) / 2
+
+    def angle(ux, uy, vx, vy):
+        return np.arctan2(ux * vy - uy * vx, ux * vx + uy * vy)
+
+    theta = angle(1, 0, (x1 - cx1) / rx, (y1 - cy1) / ry)
+    delta = angle((x1 - cx1) / rx, (y1 - cy1) / ry, (-x1 - cx1) / rx, (-y1 - cy1) / ry)
+    if not sweep and delta > 0:
+        delta -= 2 * np.pi
+    elif sweep and delta < 0:
+        delta += 2 * np.pi
+
+    n = int(np.ceil(abs(delta) / (np.pi / 2) - 1e-9))
+    d = delta / n
+    t = 4 / 3 * np.tan(d / 4)
+
+    def point(a):
+        x, y = rx * np.cos(a), ry * np.sin(a)
+        return (cx + cos * x - sin * y, cy + sin * x + cos * y)
+
+    def deriv(a):
+        x, y = -rx * np.sin(a), ry * np.cos(a)
+        return (cos * x - sin * y, sin * x + cos * y)
+
+    segments = []
+    start = p0
+    for k in range(n):
+        a0, a1 = theta + k * d, theta + (k + 1) * d
+        end = p1 if k == n - 1 else point(a1)
+        t0, t1 = deriv(a0), deriv(a1)
+        c1 = (start[0] + t * t0[0], start[1] + t * t0[1])
+        c2 = (end[0] - t * t1[0], end[1] - t * t1[1])
+        segments.append(('c', start, c1, c2, end))
+        start = end
+    return segments
+
+def ellipse_segments(cx, cy, rx, ry):
+    # four cubic Bezier curves, starting from the rightmost point
+    kx, ky = KAPPA * rx, KAPPA * ry
+    pts = [(cx + rx, cy), (cx, cy + ry), (cx - rx, cy), (cx, cy - ry)]
+    ctrls = [((cx + rx, cy + ky), (cx + kx, cy + ry)),
+             ((cx - kx, cy + ry), (cx - rx, cy + ky)),
+             ((cx - rx, cy - ky), (cx - kx, cy - ry)),
+             ((cx + kx, cy - ry), (cx + rx, cy - ky))]
+    return [('c', pts[k], *ctrls[k], pts[(k + 1) % 4]) for k in range(4)]
+
+def shape_subpaths(tag, attrib):
+    # geometry of a basic shape element in user space: a list of (segments, closed), or
+    # ('re', (x0, y0, x1, y1)) for a rectangle without rounded corners
+    g = lambda key: parse_length(attrib.get(key))
+    if tag == 'path':
+        return path_segments(attrib.get('d'))
+    elif tag == 'line':
+        return [([('l', (g('x1'), g('y1')), (g('x2'), g('y2')))], False)]
+    elif tag in ('polyline', 'polygon'):
+        nums = parse_numbers(attrib.get('points'))
+        pts = list(zip(nums[0::2], nums[1::2]))
+        segments = [('l', p0, p1) for p0, p1 in zip(pts[:-1], pts[1:])]
+        if tag == 'polygon' and len(pts) > 2:
+            if pts[-1] != pts[0]:
+                segments.append(('l', pts[-1], pts[0]))
+            return [(segments, True)]
+        return [(segments, False)]
+    elif tag == 'rect':
+        x, y, w, h = g('x'), g('y'), g('width'), g('height')
+        if w <= 0 or h <= 0:
+            return []
+        rx, ry = attrib.get('rx'), attrib.get('ry')
+        rx, ry = parse_length(rx if rx is not None else ry), parse_length(ry if ry is not None else rx)
+        rx, ry = min(rx, w / 2), min(ry, h / 2)
+        if rx <= 0 or ry <= 0:
+            return ('re', (x, y, x + w, y + h))
+        d = (f'M{x + rx},{y} H{x + w - rx} A{rx},{ry} 0 0 1 {x + w},{y + ry} V{y + h - ry} '
+             f'A{rx},{ry} 0 0 1 {x + w - rx},{y + h} H{x + rx} A{rx},{ry} 0 0 1 {x},{y + h - ry} '
+             f'V{y + ry} A{rx},{ry} 0 0 1 {x + rx},{y} Z')
+        return path_segments(d)
+    elif tag == 'circle':
+        r = g('r')
+        return [(ellipse_segments(g('cx'), g('cy'), r, r), True)] if r > 0 else []
+    elif tag == 'ellipse':
+        rx, ry = g('rx'), g('ry')
+        return [(ellipse_segments(g('cx'), g('cy'), rx, ry), True)] if rx > 0 and ry > 0 else []
+    return []
+
+#%% drawing records
+def is_rect(items):
+    # whether the items are four lines going around an axis-aligned box
+    if len(items) != 4 or any(item[0] != 'l' for item in items) or items[-1][2] != items[0][1]:
+        return False
+    first_vertical = items[0][1].x == items[0][2].x
+    for k, (_, p, q) in enumerate(items):
+        vertical, horizontal = p.x == q.x, p.y == q.y
+        if vertical == horizontal or vertical != (first_vertical == (k % 2 == 0)):
+            return False
+    return True
+
+def make_drawing(geometry, transform, style, opacity, seqno):
+    # convert the geometry of one shape (see `shape_subpaths`) to a drawing record; returns None if nothing is drawn
+    if style.get('visibility', 'visible') != 'visible':
+        return None
+    current = style.get('color', 'black')
+    fill = parse_color(style.get('fill', 'black'), current)
+    stroke = parse_color(style.get('stroke', 'none'), current)
+    a, b, c, d, e, f = transform
+    scale = np.sqrt(abs(a * d - b * c))
+    width = parse_length(style.get('stroke-width'), default=1.) * scale
+    if stroke is not None and width <= 0:
+        stroke = None
+    if fill is None and stroke is None:
+        return None
+    if not geometry:
+        return None
+
+    if geometry[0] == 're' and b == 0 and c == 0: # still an axis-aligned rectangle
+        x0, y0, x1, y1 = geometry[1]
+        x0, x1 = np.sort([a * x0 + e, a * x1 + e])
+        y0, y1 = np.sort([d * y0 + f, d * y1 + f])
+        items = [('re', fitz.Rect(x0, y0, x1, y1), 1)]
+        closed = None
+        rect = fitz.Rect(x0, y0, x1, y1)
+    else:
+        if geometry[0] == 're':
+            x0, y0, x1, y1 = geometry[1]
+            corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+            geometry = [([('l', p0, p1) for p0, p1 in zip(corners, corners[1:])], True)]
+        # transform all points at once
+        pts = np.array([pt for segments, _ in geometry for seg in segments for pt in seg[1:]], dtype=float)
+        xs = a * pts[:, 0] + c * pts[:, 1] + e
+        ys = b * pts[:, 0] + d * pts[:, 1] + f
+        points = [fitz.Point(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+        items = []
+        k = 0
+        for segments, _ in geometry:
+            for seg in segments:
+                n = len(seg) - 1
+                items.append((seg[0], *points[k:k + n]))
+                k += n
+        closed = False # like fitz, closing lines are kept as items
+        rect = fitz.Rect(xs.min(), ys.min(), xs.max(), ys.max())
+        if len(geometry) == 1 and geometry[0][1] and is_rect(items) \
+                and sum(p.x * q.y - q.x * p.y for _, p, q in items) < 0:
+            # like fitz, an axis-aligned closed box drawn in this direction is a rectangle
+            items = [('re', fitz.Rect(rect), 1)]
+
+    drawing = {
+        'items': items,
+        'type': ('f' if fill is not None else '') + ('s' if stroke is not None else ''),
+        'even_odd': style.get('fill-rule', 'nonzero') == 'evenodd' if fill is not None else None,
+        'fill_opacity': float(style.get('fill-opacity', 1)) * opacity if fill is not None else None,
+        'fill': fill,
+        'rect': rect,
+        'seqno': seqno,
+        'layer': '',
+        'closePath': closed,
+        }
+    if stroke is not None:
+        dashes = parse_numbers(style.get('stroke-dasharray', 'none'))
+        offset = parse_length(style.get('stroke-dashoffset'))
+        cap = LINECAPS.get(style.get('stroke-linecap', 'butt'), 0)
+        drawing.update({
+            'stroke_opacity': float(style.get('stroke-opacity', 1)) * opacity,
+            'color': stroke,
+            'width': width,
+            'lineCap': (cap, cap, cap),
+            'lineJoin': float(LINEJOINS.get(style.get('stroke-linejoin', 'miter'), 0)),
+            'dashes': '[{}] {:g}'.format(' '.join(f'{dash * scale:g}' for dash in dashes), offset * scale),
+            })
+    else:
+        drawing.update({key: None for key in ['stroke_opacity', 'color', 'width', 'lineCap', 'lineJoin', 'dashes']})
+    return drawing
+
+def iter_svg_drawings(svg_path):
+    '''
+    read drawings from a SVG file one by one.
+
+    Parameters
+    ----------
+    svg_path : str
+        Path to the SVG file.
+
+    Yields
+    ------
+    drawing : dict
+        A drawing record of the same format as ``fitz.Page.get_drawings()``.
+    '''
+    # each entry: (transform, inherited style, opacity, skip), where skip is
+    # None, 'hidden' (not rendered), or 'def' (not rendered but recorded for <use>)
+    stack = [(IDENTITY, dict(DEFAULT_STYLE), 1., None)]
+    elems = [] # the open elements
+    defs = {} # id: list of (geometry, transform relative to the def, style specified within the def)
+    def_ids = [] # (element depth, id, transform of the parent of the def) of the open definitions
+    seqno = 0
+
+    for event, elem in iterparse(svg_path, events=('start', 'end')):
+        tag = _local(elem.tag)
+        if event == 'start':
+            transform, style, opacity, skip = stack[-1]
+            parent_transform = transform
+            own = parse_style(elem.attrib)
+            style = {**style, **{key: value for key, value in own.items() if key in INHERITED}}
+            if skip != 'hidden':
+                if tag in NOT_RENDERED or own.get('display') == 'none':
+                    skip = 'hidden'
+                elif tag in DEFINITIONS:
+                    skip = 'def'
+            opacity = opacity * float(own.get('opacity', 1))
+            if tag == 'svg':
+                transform = multiply(transform, viewbox_transform(elem.attrib))
+            transform = multiply(transform, parse_transform(elem.attrib.get('transform')))
+            if tag == 'use':
+                x, y = parse_length(elem.attrib.get('x')), parse_length(elem.attrib.get('y'))
+                transform = multiply(transform, (1., 0., 0., 1., x, y))
+            stack.append((transform, style, opacity, skip))
+            elems.append(elem)
+            if skip == 'def' and 'id' in elem.attrib:
+                def_ids.append((len(elems), elem.attrib['id'], parent_transform))
+                defs[elem.attrib['id']] = []
+            continue
+
+        # end of an element
+        transform, style, opacity, skip = stack.pop()
+        if skip == 'def' and tag in SHAPES:
+            # a referenced shape inherits style from <use>, except for what is specified within the definition
+            for depth, def_id, def_transform in def_ids:
+                inv = np.linalg.inv(np.array([[def_transform[0], def_transform[2], def_transform[4]],
+                                              [def_transform[1], def_transform[3], def_transform[5]],
+                                              [0, 0, 1]]))
+                rel = multiply(tuple(inv[:2].T.ravel()), transform)
+                specified = {}
+                for el in elems[depth - 1:]:
+                    specified.update({key: value for key, value in parse_style(el.attrib).items() if key in INHERITED})
+                defs[def_id].append((shape_subpaths(tag, elem.attrib), rel, specified))
+        elif skip is None and tag in SHAPES:
+            drawing = make_drawing(shape_subpaths(tag, elem.attrib), transform, style, opacity, seqno)
+            if drawing is not None:
+                seqno += 1
+                yield drawing
+        elif skip is None and tag == 'use':
+            ref = _href(elem.attrib)
+            for geometry, rel, specified in defs.get((ref or '')[1:], []):
+                drawing = make_drawing(geometry, multiply(transform, rel),
+                                       {**style, **specified}, opacity, seqno)
+                if drawing is not None:
+                    seqno += 1
+                    yield drawing
+        elems.pop()
+        if def_ids and def_ids[-1][0] == len(elems) + 1:
+            def_ids.pop()
+
+        # free the memory: the element closed is always the last child of its parent
+        elem.clear()
+        if elems:
+            del elems[-1][-1]
+
+def svg2drawings(svg_path):
+    return list(iter_svg_drawings(svg_path))
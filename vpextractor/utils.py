@@ -7,20 +7,30 @@ Created on Thu Jan 18 23:26:16 2024
 
 try:
     from pyttop.utils import save_pickle, load_pickle, pause_and_warn
-    from pyttop.plot import _annotate
+    _pyttop = True
 except ImportError:
-    from ._utils import save_pickle, load_pickle, pause_and_warn, _annotate
+    from ._utils import save_pickle, load_pickle, pause_and_warn
+    _pyttop = False
 
-from functools import wraps
 import numpy as np
+from argparse import ArgumentTypeError
 
-@wraps(_annotate)
 def annotate(*args, **kwargs):
+    # see `_utils._annotate`, imported here as it needs matplotlib
+    # (not `pyttop.plot._annotate`, which pauses pyplot to get the offset of the tick labels)
+    from ._utils import _annotate
     artists = _annotate(*args, **kwargs)
     for artist in artists.values():
         artist.set_picker(True)
     return artists
 
+def positive_float(value):
+    # argparse type of positive numbers (e.g., tolerances)
+    value = float(value)
+    if not value > 0:
+        raise ArgumentTypeError(f'expected a positive number, got {value}')
+    return value
+
 def dedup(arr, axis=0):
     if axis != 0:
         raise NotImplementedError()